@@ -0,0 +1,113 @@
+"""
+Compares bare module-level requests calls against the pooled WalletApiClient on the
+100-transaction flow of test_large_volume_of_transactions.
+
+Usage: python -m benchmarks.bench_connection_pooling [--transactions N]
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+import requests
+from urllib3.connection import HTTPConnection
+
+import config
+from common.client import WalletApiClient
+from fixtures.auth_fixtures import _authenticate
+
+
+class _BareClient:
+    """Mimics the pre-pooling code: every call goes through requests.get/requests.post."""
+
+    def __init__(self, headers):
+        self.headers = headers
+
+    def post_transaction(self, wallet_id, payload):
+        """POST a transaction with a fresh connection."""
+        return requests.post(f"{config.BASE_URL}/wallet/{wallet_id}/transaction",
+                             json=payload,
+                             headers=self.headers,
+                             timeout=config.DEFAULT_API_TIMEOUT)
+
+    def get_transaction(self, wallet_id, transaction_id):
+        """GET a transaction with a fresh connection."""
+        return requests.get(f"{config.BASE_URL}/wallet/{wallet_id}/transaction/{transaction_id}",
+                            headers=self.headers,
+                            timeout=config.DEFAULT_API_TIMEOUT)
+
+    def close(self):
+        """Nothing to release."""
+
+
+@contextmanager
+def _count_connections():
+    """Count the TCP connections urllib3 opens while the block runs."""
+    counter = {"connections": 0}
+    original_new_conn = HTTPConnection._new_conn  # pylint: disable=protected-access
+
+    def counting_new_conn(self):
+        counter["connections"] += 1
+        return original_new_conn(self)
+
+    HTTPConnection._new_conn = counting_new_conn  # pylint: disable=protected-access
+    try:
+        yield counter
+    finally:
+        HTTPConnection._new_conn = original_new_conn  # pylint: disable=protected-access
+
+
+def _run_large_volume_flow(client, num_transactions):
+    """Replay test_large_volume_of_transactions: POST N credits, then poll each one."""
+    wallet_id = str(uuid.uuid4())
+    transaction_ids = []
+    for _ in range(num_transactions):
+        payload = {"currency": "USD", "amount": round(random.uniform(1, 10), 2), "type": "credit"}
+        response = client.post_transaction(wallet_id, payload)
+        assert response.status_code == 200, "Failed to perform transaction"
+        transaction_ids.append(response.json()["transactionId"])
+
+    for transaction_id in transaction_ids:
+        while True:
+            response = client.get_transaction(wallet_id, transaction_id)
+            assert response.status_code == 200, "Failed to fetch transaction status"
+            if response.json()["status"] != "pending":
+                break
+            time.sleep(1)
+
+
+def measure(client, num_transactions):
+    """Run the flow once and return the connections opened and elapsed time."""
+    with _count_connections() as counter:
+        start = time.perf_counter()
+        _run_large_volume_flow(client, num_transactions)
+        elapsed = time.perf_counter() - start
+    client.close()
+    return {"connections_opened": counter["connections"], "elapsed_seconds": round(elapsed, 3)}
+
+
+def main():
+    """Run both variants and print the comparison as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=100)
+    args = parser.parse_args()
+
+    token = _authenticate()
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "X-Service-Id": config.X_SERVICE_ID,
+        "Content-Type": "application/json"
+    }
+    results = {
+        "transactions": args.transactions,
+        "bare_requests": measure(_BareClient(headers), args.transactions),
+        "pooled_client": measure(WalletApiClient(headers=headers), args.transactions),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
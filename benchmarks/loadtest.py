@@ -0,0 +1,250 @@
+"""
+Open-loop throughput and latency load test for POST /wallet/{walletId}/transaction.
+
+Wallets are funded the same way as the funded_wallet fixture, then credits and debits shaped
+like the test payloads are sent at a fixed request rate regardless of how fast the server
+answers. Latencies are measured from each request's scheduled send time, so server slowdowns
+show up as latency instead of silently lowering the rate.
+
+Usage: python -m benchmarks.loadtest --rate 50 --duration 30 --wallets 10 [--local]
+           [--slo accept_p99_ms=250 --slo settle_p95_ms=5000 --slo error_rate=0.01]
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import config
+from common import helpers, payloads, submission
+from common.auth import AuthManager, service_headers
+from common.client import WalletApiClient
+from common.histogram import LatencyHistogram
+from common.ledger import Ledger
+from stand_in import StandInServer
+
+
+class SettlementTracker:  # pylint: disable=too-many-instance-attributes
+    """Polls submitted transactions in the background and records pending -> finished latency
+    from each transaction's scheduled send time."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, api_client, histogram, ledger, poll_interval=0.25, workers=16):
+        self.api_client = api_client
+        self.histogram = histogram
+        self.ledger = ledger
+        self.poll_interval = poll_interval
+        self.outcomes = Counter()
+        self.poll_errors = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start polling in the background."""
+        self._thread.start()
+        return self
+
+    def add(self, wallet_id, transaction_id, payload, sent_at):
+        """Track a transaction accepted by the API."""
+        with self._lock:
+            self._pending[transaction_id] = (wallet_id, payload, sent_at)
+
+    @property
+    def pending(self):
+        """Number of transactions not yet seen in a terminal state."""
+        with self._lock:
+            return len(self._pending)
+
+    def drain(self, timeout):
+        """Wait up to `timeout` seconds for the pending set to empty, then stop polling."""
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+        self._stop.set()
+        self._thread.join()
+        self._executor.shutdown()
+
+    def _check(self, transaction_id, wallet_id, payload, sent_at):
+        try:
+            response = self.api_client.get_transaction(wallet_id, transaction_id)
+        except requests.RequestException:
+            response = None
+        if response is None or response.status_code != 200:
+            with self._lock:
+                self.poll_errors += 1
+            return
+        data = response.json()
+        if helpers.transaction_settled(data):
+            self.histogram.record(time.monotonic() - sent_at)
+            self.ledger.settle(wallet_id, payload, data["outcome"])
+            with self._lock:
+                self._pending.pop(transaction_id, None)
+                self.outcomes[data["outcome"]] += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                snapshot = list(self._pending.items())
+            futures = [self._executor.submit(self._check, transaction_id, *entry)
+                       for transaction_id, entry in snapshot]
+            for future in futures:
+                future.result()
+            self._stop.wait(self.poll_interval)
+
+
+def _next_payload(wallet, debit_ratio):
+    """Credit or small debit in the wallet's currency, shaped like the test payloads."""
+    if random.random() < debit_ratio:
+        return payloads.transaction_payload(wallet["currency"], payloads.random_amount(1, 5),
+                                            "debit")
+    return payloads.random_credit(wallet["currency"], 1, 10)
+
+
+# pylint: disable-next=too-many-arguments,too-many-locals
+def run_load(api_client, rate, duration, wallets, *, workers=64, debit_ratio=0.2,
+             settle_timeout=60):
+    """Fund `wallets` wallets, drive `rate` POSTs per second for `duration` seconds and
+    return the latency and error report. Every wallet is checked against the ledger at the
+    end; transactions still unsettled only widen the accepted balance range."""
+    with ThreadPoolExecutor(max_workers=min(wallets, workers)) as executor:
+        funded = list(executor.map(lambda _: helpers.fund_wallet(str(uuid.uuid4()), api_client),
+                                   range(wallets)))
+    ledger = Ledger()
+    for wallet in funded:
+        funding = payloads.transaction_payload(wallet["currency"], wallet["amount"], "credit")
+        ledger.submit(wallet["wallet_id"], funding)
+        ledger.settle(wallet["wallet_id"], funding, "approved")
+
+    accept_histogram = LatencyHistogram()
+    tracker = SettlementTracker(api_client, LatencyHistogram(), ledger).start()
+    errors = Counter()
+    errors_lock = threading.Lock()
+    submissions = Counter()  # POSTs retried and ambiguous outcomes reconciled by lookup
+
+    def send(sent_at, wallet):
+        payload = _next_payload(wallet, debit_ratio)
+        ledger.submit(wallet["wallet_id"], payload)
+        try:
+            response = submission.submit_transaction(api_client, wallet["wallet_id"], payload,
+                                                     stats=submissions)
+            error = None if response.status_code == 200 else str(response.status_code)
+        except requests.RequestException as exception:
+            error = type(exception).__name__  # its outcome is unknown, it stays in flight
+        if error is not None:
+            if error.isdigit():
+                ledger.settle(wallet["wallet_id"], payload, None)
+            with errors_lock:
+                errors[error] += 1
+            return
+        accept_histogram.record(time.monotonic() - sent_at)
+        tracker.add(wallet["wallet_id"], response.json()["transactionId"], payload, sent_at)
+
+    sent = 0
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while sent / rate < duration:
+            scheduled = start + sent / rate
+            time.sleep(max(0.0, scheduled - time.monotonic()))
+            executor.submit(send, scheduled, funded[sent % wallets])
+            sent += 1
+    elapsed = time.monotonic() - start
+    tracker.drain(settle_timeout)
+    _, balance_mismatches = ledger.check_wallets(api_client,
+                                                 [wallet["wallet_id"] for wallet in funded],
+                                                 max_workers=workers)
+
+    error_count = sum(errors.values())
+    return {
+        "config": {"rate": rate, "duration": duration, "wallets": wallets, "workers": workers,
+                   "debit_ratio": debit_ratio},
+        "requests": sent,
+        "achieved_rate": round(sent / elapsed, 3),
+        "errors": dict(errors),
+        "submissions": dict(submissions),
+        "error_rate": round(error_count / sent, 6) if sent else 0.0,
+        "post_acceptance": accept_histogram.summary(),
+        "settlement": tracker.histogram.summary(),
+        "outcomes": dict(tracker.outcomes),
+        "unsettled": tracker.pending,
+        "poll_errors": tracker.poll_errors,
+        "balance_mismatches": balance_mismatches,
+    }
+
+
+def check_slos(report, slos):
+    """Return the violated SLOs, e.g. {"accept_p99_ms": 250} checks post_acceptance.p99_ms."""
+    sections = {"accept": "post_acceptance", "settle": "settlement"}
+    violations = []
+    for name, threshold in slos.items():
+        if name == "error_rate":
+            actual = report["error_rate"]
+        else:
+            section, _, metric = name.partition("_")
+            actual = report[sections[section]][metric]
+        if actual is None or actual > threshold:
+            violations.append({"slo": name, "threshold": threshold, "actual": actual})
+    return violations
+
+
+def _parse_slo(value):
+    name, _, threshold = value.partition("=")
+    valid = {"error_rate"} | {f"{section}_{metric}" for section in ("accept", "settle")
+                              for metric in ("p50_ms", "p95_ms", "p99_ms", "max_ms")}
+    if name not in valid:
+        raise argparse.ArgumentTypeError(f"unknown SLO {name!r}, expected one of {sorted(valid)}")
+    return name, float(threshold)
+
+
+def main():
+    """Run the load test and print the JSON report, exiting 1 on an SLO violation or a
+    wallet balance that does not match the ledger."""
+    parser = argparse.ArgumentParser(description="Open-loop Wallet API load test")
+    parser.add_argument("--rate", type=float, default=20, help="requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load")
+    parser.add_argument("--wallets", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--debit-ratio", type=float, default=0.2)
+    parser.add_argument("--settle-timeout", type=float, default=60)
+    parser.add_argument("--slo", type=_parse_slo, action="append", default=[],
+                        help="NAME=THRESHOLD, e.g. accept_p99_ms=250 or error_rate=0.01")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--local", action="store_true",
+                        help="run against an in-process stand-in server")
+    args = parser.parse_args()
+
+    server = StandInServer().start() if args.local else None
+    if server is not None:
+        config.BASE_URL = server.base_url
+    auth_manager = AuthManager().start_background_refresh()
+    try:
+        with WalletApiClient(headers=service_headers(), auth=auth_manager,
+                             pool_size=args.workers) as api_client:
+            report = run_load(api_client, args.rate, args.duration, args.wallets,
+                              workers=args.workers, debit_ratio=args.debit_ratio,
+                              settle_timeout=args.settle_timeout)
+    finally:
+        auth_manager.stop()
+        if server is not None:
+            server.stop()
+
+    report["slo_violations"] = check_slos(report, dict(args.slo))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    sys.exit(1 if report["slo_violations"] or report["balance_mismatches"] else 0)
+
+
+if __name__ == "__main__":
+    main()
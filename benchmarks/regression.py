@@ -0,0 +1,188 @@
+"""
+Performance regression suite for the Wallet API and this client.
+
+Every benchmark is timed over a number of iterations after a warm-up against the local
+stand-in (--local) or WALLET_API_BASE_URL, and summarised as p50/p95/p99/max. --save stores
+the run as the baseline of the current commit, and the run fails when a benchmark's p95
+regressed by more than --max-regression percent against --baseline (a commit or ref, by
+default the latest saved baseline of another commit).
+
+Usage: python -m benchmarks.regression [--local] [--save] [--baseline origin/main]
+           [--max-regression 25] [--only credit_round_trip] [--iterations 20]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import config
+from common import auth, helpers, load, payloads
+from common.auth import AuthManager
+from common.baselines import BaselineStore, compare, git_commit
+from common.client import WalletApiClient
+from common.histogram import LatencyHistogram
+from common.notifications import SettlementListener
+from common.snapshots import take_snapshot
+from stand_in import StandInServer
+
+BULK_WALLETS = 100
+BATCH_SIZE = 100
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class _Context:
+    """What the benchmarks share: the client, the settlement listener and the wallets read by
+    bulk_wallet_reads, funded once on first use."""
+
+    def __init__(self, api_client, listener):
+        self.api_client = api_client
+        self.listener = listener
+        self._bulk_wallets = None
+
+    @property
+    def bulk_wallets(self):
+        """Funded wallet ids for the bulk read benchmark."""
+        if self._bulk_wallets is None:
+            with ThreadPoolExecutor(max_workers=config.HTTP_POOL_SIZE) as executor:
+                funded = executor.map(lambda _: helpers.fund_wallet(str(uuid.uuid4()),
+                                                                    self.api_client),
+                                      range(BULK_WALLETS))
+                self._bulk_wallets = [wallet["wallet_id"] for wallet in funded]
+        return self._bulk_wallets
+
+
+def bench_login(_context):
+    """POST /user/login."""
+    auth.login()
+
+
+def bench_credit_round_trip(context):
+    """One credit from POST until it is approved."""
+    wallet_id = str(uuid.uuid4())
+    response = context.api_client.post_transaction(wallet_id, payloads.random_credit())
+    assert response.status_code == 200, "Failed to perform transaction"
+    helpers.wait_for_transaction_succeeded(wallet_id, response.json()["transactionId"],
+                                           context.api_client)
+
+
+def bench_funded_wallet_setup(context):
+    """helpers.fund_wallet on a new wallet, as the wallet pool does."""
+    helpers.fund_wallet(str(uuid.uuid4()), context.api_client)
+
+
+def bench_settle_batch(context):
+    """Submit 100 concurrent credits and wait until all of them settled."""
+    wallet_id = str(uuid.uuid4())
+    submission = load.submit_transactions(context.api_client, wallet_id,
+                                          [payloads.random_credit() for _ in range(BATCH_SIZE)])
+    transaction_ids = [result["body"]["transactionId"] for result in submission["results"]]
+    helpers.wait_for_transactions(wallet_id, transaction_ids, helpers.transaction_settled,
+                                  context.api_client, listener=context.listener)
+
+
+def bench_bulk_wallet_reads(context):
+    """Snapshot of 100 funded wallets."""
+    snapshot = take_snapshot(context.api_client, context.bulk_wallets)
+    assert not snapshot.errors, f"Failed to read wallets {snapshot.errors}"
+
+
+def bench_suite_startup(_context):
+    """Start-up cost every pytest process (and xdist worker) pays before the first test:
+    interpreter start, conftest and test module imports and collection."""
+    subprocess.run([sys.executable, "-m", "pytest", "--collect-only", "-q", "--no-api-trace",
+                    "-p", "no:cacheprovider"], cwd=ROOT, check=True, capture_output=True)
+
+
+# (name, benchmark, default iterations)
+BENCHMARKS = [
+    ("login", bench_login, 20),
+    ("credit_round_trip", bench_credit_round_trip, 20),
+    ("funded_wallet_setup", bench_funded_wallet_setup, 20),
+    ("settle_100_batch", bench_settle_batch, 5),
+    ("bulk_wallet_reads", bench_bulk_wallet_reads, 10),
+    ("suite_startup", bench_suite_startup, 5),
+]
+
+
+def run_benchmarks(context, names=None, iterations=None, warmup=1):
+    """Time every selected benchmark and return {name: summary}."""
+    results = {}
+    for name, benchmark, default_iterations in BENCHMARKS:
+        if names and name not in names:
+            continue
+        for _ in range(warmup):
+            benchmark(context)
+        histogram = LatencyHistogram()
+        for _ in range(iterations or default_iterations):
+            start = time.perf_counter()
+            benchmark(context)
+            histogram.record(time.perf_counter() - start)
+        results[name] = histogram.summary()
+    return results
+
+
+def main():
+    """Run the suite, print the JSON report and exit 1 when a benchmark regressed."""
+    parser = argparse.ArgumentParser(description="Wallet API performance regression suite")
+    parser.add_argument("--local", action="store_true",
+                        help="run against an in-process stand-in server")
+    parser.add_argument("--only", action="append", choices=[name for name, *_ in BENCHMARKS],
+                        help="run only this benchmark (repeatable)")
+    parser.add_argument("--iterations", type=int, help="override every benchmark's iterations")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--save", action="store_true",
+                        help="store the results as the baseline of the current commit")
+    parser.add_argument("--baseline", help="commit or ref to compare with, "
+                                           "default: the latest baseline of another commit")
+    parser.add_argument("--max-regression", type=float, default=config.BENCHMARK_MAX_REGRESSION,
+                        help="percent a p95 may grow over the baseline")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore p95 growth below this many milliseconds")
+    args = parser.parse_args()
+
+    target = "local" if args.local else "live"
+    store = BaselineStore()
+    commit = git_commit() or "unknown"
+    if args.baseline:
+        baseline_commit = git_commit(args.baseline)
+        baseline = store.load(baseline_commit, target) if baseline_commit else None
+        if baseline is None:
+            parser.error(f"no {target} baseline saved for {args.baseline}")
+    else:
+        baseline = store.latest(target, exclude=commit)
+
+    server = StandInServer().start() if args.local else None
+    if server is not None:
+        config.BASE_URL = server.base_url
+    auth_manager = AuthManager().start_background_refresh()
+    try:
+        with WalletApiClient(headers=auth.service_headers(), auth=auth_manager) as api_client:
+            listener = SettlementListener(api_client).start()
+            try:
+                benchmarks = run_benchmarks(_Context(api_client, listener), args.only,
+                                            args.iterations, args.warmup)
+            finally:
+                listener.stop()
+    finally:
+        auth_manager.stop()
+        if server is not None:
+            server.stop()
+
+    report = {"commit": commit, "target": target, "benchmarks": benchmarks,
+              "baseline": baseline["commit"] if baseline else None, "comparison": []}
+    if baseline is not None:
+        report["comparison"] = compare(benchmarks, baseline, args.max_regression,
+                                       args.min_delta_ms)
+    if args.save:
+        report["saved"] = store.save(commit, target, benchmarks, base_url=config.BASE_URL)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if any(entry["regressed"] for entry in report["comparison"]) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Streaming soak test for POST /wallet/{walletId}/transaction.
+
+Transactions are generated on the fly and at most --window of them are in flight at a time.
+Every settlement is verified as it arrives and appended to --output as one JSON line, and a
+rolling throughput line is printed to stderr every --report-every seconds, so the run can go on
+for millions of transactions with flat memory.
+
+Usage: python -m benchmarks.soak --transactions 1000000 --window 256 [--duration 3600] [--local]
+"""
+
+import argparse
+import json
+import sys
+import uuid
+
+import config
+from common import payloads
+from common.auth import AuthManager, service_headers
+from common.client import WalletApiClient
+from common.notifications import SettlementListener
+from common.soak import SoakRun
+from stand_in import StandInServer
+
+
+def main():
+    """Run the soak test and print the JSON summary, exiting 1 on a failed verification."""
+    parser = argparse.ArgumentParser(description="Streaming Wallet API soak test")
+    parser.add_argument("--transactions", type=int, help="stop after this many transactions")
+    parser.add_argument("--duration", type=float, help="stop submitting after this many seconds")
+    parser.add_argument("--window", type=int, default=256, help="max transactions in flight")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--currency", default="USD")
+    parser.add_argument("--debit-ratio", type=float, default=0.0)
+    parser.add_argument("--settle-timeout", type=float, default=60)
+    parser.add_argument("--report-every", type=float, default=10, help="seconds between reports")
+    parser.add_argument("--output", default="soak-results.jsonl",
+                        help="append-only file with one result line per transaction")
+    parser.add_argument("--local", action="store_true",
+                        help="run against an in-process stand-in server")
+    args = parser.parse_args()
+    if args.transactions is None and args.duration is None:
+        parser.error("one of --transactions or --duration is required")
+
+    server = StandInServer().start() if args.local else None
+    if server is not None:
+        config.BASE_URL = server.base_url
+    auth_manager = AuthManager().start_background_refresh()
+    try:
+        with WalletApiClient(headers=service_headers(), auth=auth_manager,
+                             pool_size=args.workers) as api_client:
+            listener = SettlementListener(api_client).start()
+            try:
+                run = SoakRun(api_client, str(uuid.uuid4()), args.output, window=args.window,
+                              workers=args.workers, listener=listener,
+                              settle_timeout=args.settle_timeout,
+                              report_interval=args.report_every,
+                              on_report=lambda line: print(json.dumps(line), file=sys.stderr))
+                stream = payloads.transaction_stream(args.currency, args.debit_ratio)
+                summary = run.run(stream, limit=args.transactions, duration=args.duration)
+            finally:
+                listener.stop()
+    finally:
+        auth_manager.stop()
+        if server is not None:
+            server.stop()
+
+    summary["wallet_id"] = run.wallet_id
+    print(json.dumps(summary, indent=2))
+    failed = summary["counts"].get("mismatched") or summary["balance_verified"] is False
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
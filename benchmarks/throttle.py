@@ -0,0 +1,62 @@
+"""
+Throttle-threshold probe for POST /wallet/{walletId}/transaction.
+
+Transactions are paced by a token bucket at --rate across --wallets wallets. 429 responses are
+honoured (Retry-After, or backoff without it), retried and lower the allowed rate, so the
+report shows where the server starts throttling and how far the achieved rate fell below the
+target, without hammering it.
+
+Usage: python -m benchmarks.throttle --rate 100 --duration 30 --wallets 10 [--fixed-rate]
+           [--local [--stand-in-rate-limit 20]]
+"""
+
+import argparse
+import json
+import uuid
+
+import config
+from common.auth import AuthManager, service_headers
+from common.client import WalletApiClient
+from common.scheduler import run_paced
+from stand_in import StandInServer
+
+
+def main():
+    """Run the probe and print the JSON report."""
+    parser = argparse.ArgumentParser(description="Wallet API throttle-threshold probe")
+    parser.add_argument("--rate", type=float, default=50, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of traffic")
+    parser.add_argument("--wallets", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--fixed-rate", action="store_true",
+                        help="keep the target rate instead of backing off on 429")
+    parser.add_argument("--local", action="store_true",
+                        help="run against an in-process stand-in server")
+    parser.add_argument("--stand-in-rate-limit", type=float,
+                        help="with --local, transactions per second each wallet accepts")
+    args = parser.parse_args()
+
+    server = StandInServer().start() if args.local else None
+    if server is not None:
+        config.BASE_URL = server.base_url
+    wallet_ids = [str(uuid.uuid4()) for _ in range(args.wallets)]
+    if server is not None and args.stand_in_rate_limit:
+        for wallet_id in wallet_ids:
+            server.state.configure_wallet(wallet_id, rate_limit=args.stand_in_rate_limit)
+    auth_manager = AuthManager().start_background_refresh()
+    try:
+        with WalletApiClient(headers=service_headers(), auth=auth_manager,
+                             pool_size=args.workers) as api_client:
+            report = run_paced(api_client, wallet_ids, args.rate, args.duration,
+                               workers=args.workers, max_retries=args.max_retries,
+                               adaptive=not args.fixed_rate)
+    finally:
+        auth_manager.stop()
+        if server is not None:
+            server.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+This module provides the Wallet API auth manager.
+Tokens are cached on disk with their expiry and shared between processes through a file lock,
+refreshed in the background ahead of expiry and re-fetched transparently after a 401, so long
+or parallel runs neither stall on auth nor log in once per worker.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from filelock import FileLock
+
+import config
+from common.client import WalletApiClient
+
+LOGIN_PAYLOAD = {"username": "<username>", "password": "<password>"}
+
+
+def service_headers():
+    """Headers every Wallet API request carries besides the bearer token."""
+    return {
+        "X-Service-Id": config.X_SERVICE_ID,
+        "Content-Type": "application/json"
+    }
+
+
+def login(base_url=None):
+    """Log in and return (token, expires_at) with expires_at as a UNIX timestamp."""
+    with WalletApiClient(base_url, headers=service_headers()) as client:
+        response = client.post("/user/login", json=LOGIN_PAYLOAD)
+    assert response.status_code == 200, "Authentication failed"
+    data = response.json()
+    return data.get("token"), _expiry_timestamp(data.get("expiry"))
+
+
+def _expiry_timestamp(expiry):
+    """UNIX timestamp of the login response's ISO-8601 `expiry`, AUTH_TOKEN_TTL seconds from
+    now when it is missing or unreadable."""
+    try:
+        moment = datetime.fromisoformat(str(expiry).replace("Z", "+00:00"))
+    except ValueError:
+        return time.time() + config.AUTH_TOKEN_TTL
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class AuthManager:  # pylint: disable=too-many-instance-attributes
+    """Provides a valid bearer token for one base URL, backed by a cross-process disk cache."""
+
+    def __init__(self, base_url=None, cache_file=config.AUTH_CACHE_FILE,
+                 refresh_margin=config.AUTH_REFRESH_MARGIN):
+        self.base_url = base_url or config.BASE_URL
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self._stop = threading.Event()
+        self._token_ready = threading.Event()
+        self._thread = None
+
+    @property
+    def token(self):
+        """A token that is not about to expire, logging in only when no process has one."""
+        with self._lock:
+            if not self._needs_refresh(self._expires_at):
+                return self._token
+        return self.refresh()
+
+    def headers(self):
+        """Auth headers for the Wallet API."""
+        return {"Authorization": f"Bearer {self.token}", **service_headers()}
+
+    def refresh(self, stale_token=None):
+        """Adopt a fresher token from the disk cache or log in. A `stale_token` (e.g. one the
+        server just rejected with 401) is never adopted again."""
+        with self._lock, self._file_lock():
+            cached = self._read_cache()
+            token, expires_at = cached.get("token"), cached.get("expires_at", 0.0)
+            if token is None or token == stale_token or self._needs_refresh(expires_at):
+                token, expires_at = login(self.base_url)
+                self._write_cache(token, expires_at)
+            self._token, self._expires_at = token, expires_at
+            self._token_ready.set()
+            return token
+
+    def start_background_refresh(self):
+        """Refresh the token `refresh_margin` seconds before it expires, on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, daemon=True,
+                                            name="auth-refresh")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background refresh."""
+        self._stop.set()
+        self._token_ready.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_loop(self):
+        self._token_ready.wait()  # nothing to refresh until the first login
+        while not self._stop.is_set():
+            with self._lock:
+                wait = self._expires_at - self.refresh_margin - time.time()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            try:
+                self.refresh()
+            except (AssertionError, OSError):
+                self._stop.wait(5)  # the current token stays usable until it expires
+
+    def _needs_refresh(self, expires_at):
+        return expires_at - self.refresh_margin <= time.time()
+
+    def _file_lock(self):
+        if self.cache_file is None:
+            return nullcontext()
+        return FileLock(f"{self.cache_file}.lock")
+
+    def _read_cache(self):
+        if self.cache_file is None:
+            return {"token": self._token, "expires_at": self._expires_at}
+        try:
+            with open(self.cache_file, encoding="utf-8") as file:
+                return json.load(file).get(self.base_url, {})
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, token, expires_at):
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, encoding="utf-8") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            entries = {}
+        now = time.time()
+        entries = {url: entry for url, entry in entries.items()
+                   if isinstance(entry, dict) and entry.get("expires_at", 0) > now}
+        entries[self.base_url] = {"token": token, "expires_at": expires_at}
+        # the cache holds bearer tokens, keep it readable by the current user only
+        descriptor = os.open(self.cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            json.dump(entries, file)
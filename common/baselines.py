@@ -0,0 +1,98 @@
+"""
+This module provides benchmark baselines keyed by commit.
+Each run of the regression suite is stored as one JSON file per commit and target, and a run
+is compared with a baseline by the p95 of every benchmark the two have in common.
+"""
+
+import glob
+import json
+import os
+import subprocess
+from datetime import datetime, timezone
+
+import config
+
+
+def git_commit(ref="HEAD"):
+    """Full commit hash of `ref`, with a '-dirty' suffix for HEAD of a modified work tree.
+    None outside a git checkout or for an unknown ref."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--verify", f"{ref}^{{commit}}"],
+                                capture_output=True, text=True, check=True).stdout.strip()
+        if ref == "HEAD":
+            status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout
+            if status.strip():
+                commit += "-dirty"
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit
+
+
+class BaselineStore:
+    """Baselines saved as <directory>/<commit>-<target>.json. Every save is numbered with a
+    sequence one above the highest stored, which orders baselines whose `created` times tie."""
+
+    def __init__(self, directory=config.BENCHMARK_DIR):
+        self.directory = directory
+
+    def path(self, commit, target):
+        """File of the baseline of `commit` against `target` ('local' or 'live')."""
+        return os.path.join(self.directory, f"{commit}-{target}.json")
+
+    def save(self, commit, target, benchmarks, **metadata):
+        """Store the benchmark summaries of a run and return the file path."""
+        os.makedirs(self.directory, exist_ok=True)
+        sequence = max((_sequence(baseline) for baseline in self._baselines("*")), default=0) + 1
+        path = self.path(commit, target)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"commit": commit, "target": target, "sequence": sequence,
+                       "created": datetime.now(timezone.utc).isoformat(),
+                       **metadata, "benchmarks": benchmarks}, file, indent=2)
+        return path
+
+    def load(self, commit, target):
+        """The baseline of `commit`, None when it was never saved."""
+        try:
+            with open(self.path(commit, target), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def latest(self, target, exclude=None):
+        """The most recently saved baseline for `target`, skipping commit `exclude`."""
+        baselines = [baseline for baseline in self._baselines(target)
+                     if baseline["commit"] != exclude]
+        return max(baselines, key=lambda baseline: (_sequence(baseline), baseline["created"]),
+                   default=None)
+
+    def _baselines(self, target):
+        for path in glob.glob(os.path.join(self.directory, f"*-{target}.json")):
+            with open(path, encoding="utf-8") as file:
+                yield json.load(file)
+
+
+def _sequence(baseline):
+    return baseline.get("sequence", 0)  # baselines saved before sequences were introduced
+
+
+def compare(benchmarks, baseline, max_regression=config.BENCHMARK_MAX_REGRESSION,
+            min_delta_ms=1.0):
+    """Compare the p95 of each benchmark with the baseline. A benchmark regresses when its p95
+    grew by more than `max_regression` percent and by more than `min_delta_ms`, so noise on
+    sub-millisecond timings doesn't fail a run."""
+    comparison = []
+    for name, summary in benchmarks.items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None or not previous["p95_ms"] or summary["p95_ms"] is None:
+            continue
+        delta = summary["p95_ms"] - previous["p95_ms"]
+        change = delta / previous["p95_ms"] * 100
+        comparison.append({
+            "benchmark": name,
+            "baseline_p95_ms": previous["p95_ms"],
+            "p95_ms": summary["p95_ms"],
+            "change_pct": round(change, 1),
+            "regressed": change > max_regression and delta > min_delta_ms,
+        })
+    return comparison
@@ -0,0 +1,117 @@
+"""
+This module provides a pooled HTTP client for the Wallet API.
+A single client keeps connections alive between calls so that a test run doesn't pay
+for a new TCP+TLS handshake on every request.
+"""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+from common.instrumentation import TRACER
+
+
+class WalletApiClient:
+    """Session-backed Wallet API client with keep-alive pooling and a retry policy.
+
+    Paths are relative to the base URL, e.g. ``client.get(f"/wallet/{wallet_id}")``.
+    Only idempotent methods are retried, a blind POST retry could double-credit a wallet.
+    With an `auth` manager (common.auth.AuthManager) every request carries its current token
+    and a 401 is retried once after a transparent re-login.
+    """
+
+    # pylint: disable-next=too-many-arguments
+    def __init__(self, base_url=None, *, headers=None, auth=None,
+                 pool_size=config.HTTP_POOL_SIZE,
+                 max_retries=config.HTTP_MAX_RETRIES,
+                 backoff_factor=config.HTTP_BACKOFF_FACTOR,
+                 timeout=config.DEFAULT_API_TIMEOUT):
+        self.base_url = (base_url or config.BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.auth = auth
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        retry = Retry(total=max_retries,
+                      backoff_factor=backoff_factor,
+                      status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path):
+        """Build an absolute URL from a path relative to the base URL."""
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def headers(self):
+        """Headers sent with every request, including the current auth token."""
+        headers = dict(self.session.headers)
+        if self.auth is not None:
+            headers.update(self.auth.headers())
+        return {name: value for name, value in headers.items() if value is not None}
+
+    def request(self, method, path, **kwargs):
+        """Send a request through the pooled session using the default timeout.
+        Every request is recorded by the instrumentation tracer."""
+        kwargs.setdefault("timeout", self.timeout)
+        if self.auth is None:
+            return self._send(method, path, **kwargs)
+
+        token = self.auth.token
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Authorization": f"Bearer {token}"}
+        response = self._send(method, path, **kwargs)
+        if response.status_code == 401:
+            token = self.auth.refresh(stale_token=token)
+            kwargs["headers"]["Authorization"] = f"Bearer {token}"
+            response = self._send(method, path, **kwargs)
+        return response
+
+    def _send(self, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+        except requests.RequestException:
+            TRACER.record(method, path, None, None, None, time.perf_counter() - start)
+            raise
+        TRACER.record(method, path, response.status_code, len(response.request.body or b""),
+                      len(response.content), time.perf_counter() - start,
+                      response.headers.get("Server-Timing"))
+        return response
+
+    def get(self, path, **kwargs):
+        """Send a GET request."""
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        """Send a POST request."""
+        return self.request("POST", path, **kwargs)
+
+    def get_wallet(self, wallet_id):
+        """Fetch the wallet state."""
+        return self.get(f"/wallet/{wallet_id}")
+
+    def post_transaction(self, wallet_id, payload):
+        """Submit a transaction to the wallet."""
+        return self.post(f"/wallet/{wallet_id}/transaction", json=payload)
+
+    def get_transaction(self, wallet_id, transaction_id):
+        """Fetch a single transaction of the wallet."""
+        return self.get(f"/wallet/{wallet_id}/transaction/{transaction_id}")
+
+    def close(self):
+        """Release all pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -4,43 +4,160 @@ It includes utilities for polling transaction statuses and ensuring transactions
 are completed successfully.
 """
 
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import requests
 import config
+from common import payloads, polling, submission
+from common.instrumentation import TRACER
+from common.ledger import Ledger
 
 
-def wait_for_transaction_status_update(wallet_id, transaction_id, auth_headers, poll_interval = 1, 
-                                       timeout=config.DEFAULT_API_TIMEOUT):
+def transaction_settled(data):
+    """Predicate for a transaction that is no longer 'pending'."""
+    return data["status"] != "pending"
+
+def transaction_approved(data):
+    """Predicate for a transaction that finished with an 'approved' outcome."""
+    return data["status"] == "finished" and data["outcome"] == "approved"
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def wait_for_transaction_status_update(wallet_id, transaction_id, api_client, strategy=None,
+                                       timeout=config.DEFAULT_API_TIMEOUT, stats=None):
     """
     Polls the transaction status until it is no longer 'pending' or the timeout is reached.
     """
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        response = requests.get(f"{config.BASE_URL}/{wallet_id}/transaction/{transaction_id}", 
-                                headers=auth_headers,
-                                timeout=config.DEFAULT_API_TIMEOUT)
-        assert response.status_code == 200, "Failed to fetch transaction status"
-        data = response.json()
-        if data["status"] != "pending":
-            return data
-        time.sleep(poll_interval)  # Wait N seconds before retrying
+    return _wait_for_transaction(wallet_id, transaction_id, api_client, transaction_settled,
+                                 strategy, timeout, stats)
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def wait_for_transaction_succeeded(wallet_id, transaction_id, api_client, strategy=None,
+                                   timeout=config.DEFAULT_API_TIMEOUT, stats=None):
+    """
+    Polls the transaction status until it is finished and approved or the timeout is reached.
+    """
+    return _wait_for_transaction(wallet_id, transaction_id, api_client, transaction_approved,
+                                 strategy, timeout, stats)
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def _wait_for_transaction(wallet_id, transaction_id, api_client, predicate, strategy, timeout,
+                          stats):
+    """Polls a single transaction with the given strategy until the predicate matches."""
+    strategy = strategy or polling.default_strategy()
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    attempt = 0
+    while time.monotonic() < deadline:
+        response = api_client.get_transaction(wallet_id, transaction_id)
+        if stats is not None:
+            stats.record_request(transaction_id)
+        if not polling.is_throttled(response):
+            assert response.status_code == 200, "Failed to fetch transaction status"
+            data = response.json()
+            if predicate(data):
+                if stats is not None:
+                    stats.record_terminal(transaction_id, time.monotonic() - start_time)
+                return data
+        time.sleep(polling.next_delay(strategy, attempt, deadline, response))
+        attempt += 1
     raise TimeoutError(f"Transaction {transaction_id} did not complete within {timeout} seconds")
 
-def wait_for_transaction_succeeded(wallet_id, transaction_id, auth_headers, 
-                                   timeout=config.DEFAULT_API_TIMEOUT):
+# pylint: disable-next=too-many-arguments,too-many-locals
+def wait_for_transactions(wallet_id, transaction_ids, predicate, api_client, *,
+                          strategy=None, timeout=config.DEFAULT_API_TIMEOUT,
+                          max_workers=config.HTTP_POOL_SIZE, stats=None, listener=None):
     """
-    Polls the transaction status until it is no longer 'pending' or the timeout is reached.
+    Polls a batch of transactions concurrently until each one satisfies the predicate.
+    Transactions are dropped from the pending set as soon as they match, so the whole batch
+    takes about as long as its slowest transaction; one that reaches a terminal state the
+    predicate rejects fails the wait at once.
+    With an available settlement `listener` (common.notifications) the terminal-state events
+    are awaited instead and only transactions without an event by the deadline are polled.
+    Returns {transaction_id: {"data": <final payload>, "latency": <seconds until matched>,
+    "requests": <status requests issued>}}.
     """
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        response = requests.get(f"{config.BASE_URL}/{wallet_id}/transaction/{transaction_id}", 
-                                headers=auth_headers,
-                                timeout=config.DEFAULT_API_TIMEOUT)
-        assert response.status_code == 200, "Failed to fetch transaction status"
-        data = response.json()
-        if data["status"] == "finished" and data["outcome"] == "approved":
-            return data
-        time.sleep(1)  # Wait 1 seconds before retrying
-    raise TimeoutError(f"Transaction {transaction_id} did not complete within "
-                       f"{timeout} seconds")
+    strategy = strategy or polling.default_strategy()
+    stats = stats if stats is not None else polling.PollStats()
+    results = {}
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    if listener is not None and listener.available:
+        for transaction_id, (data, arrived) in listener.wait(transaction_ids, timeout).items():
+            _assert_terminal_matches(transaction_id, data, predicate)
+            latency = max(arrived - start_time, 0.0)
+            stats.record_terminal(transaction_id, latency)
+            results[transaction_id] = {"data": data, "latency": latency, "requests": 0}
+    pending = set(transaction_ids) - set(results)
+
+    def fetch(transaction_id):
+        response = api_client.get_transaction(wallet_id, transaction_id)
+        stats.record_request(transaction_id)
+        return transaction_id, response
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        attempt = 0
+        while pending:  # at least one round, even when a listener used up the timeout
+            throttled_response = None
+            futures = [executor.submit(TRACER.bind(fetch), transaction_id)
+                       for transaction_id in pending]
+            for future in as_completed(futures):
+                transaction_id, response = future.result()
+                if polling.is_throttled(response):
+                    throttled_response = response
+                    continue
+                assert response.status_code == 200, (
+                    f"Failed to fetch transaction {transaction_id} status"
+                )
+                data = response.json()
+                if predicate(data) or transaction_settled(data):
+                    _assert_terminal_matches(transaction_id, data, predicate)
+                    latency = time.monotonic() - start_time
+                    pending.discard(transaction_id)
+                    stats.record_terminal(transaction_id, latency)
+                    results[transaction_id] = {
+                        "data": data,
+                        "latency": latency,
+                        "requests": stats.transactions[transaction_id]["requests"],
+                    }
+            if not pending or time.monotonic() >= deadline:
+                break
+            time.sleep(polling.next_delay(strategy, attempt, deadline, throttled_response))
+            attempt += 1
+
+    if pending:
+        raise TimeoutError(f"Transactions {sorted(pending)} did not complete within "
+                           f"{timeout} seconds")
+    return results
+
+def _assert_terminal_matches(transaction_id, data, predicate):
+    assert predicate(data), (
+        f"Transaction {transaction_id} reached terminal state {data['status']}/"
+        f"{data['outcome']} which does not satisfy the predicate"
+    )
+
+def fund_wallet(wallet_id, api_client, currency=None, amount=None):
+    """
+    Credits the wallet with the given (by default random) currency and amount, waits for the
+    credit to be approved and verifies the wallet holds exactly that amount.
+    Returns {"wallet_id": ..., "currency": ..., "amount": ...}.
+    """
+    currency = currency or random.choice(payloads.CURRENCIES)
+    amount = amount or payloads.random_amount(10, 500)
+    payload = payloads.transaction_payload(currency, amount, "credit")
+    ledger = Ledger()
+    ledger.submit(wallet_id, payload)
+    response = submission.submit_transaction(api_client, wallet_id, payload)
+
+    assert response.status_code == 200, (
+        f"Failed to fund wallet with {currency}, expected 200 but got {response.status_code}"
+    )
+    data = wait_for_transaction_succeeded(wallet_id, response.json()["transactionId"],
+                                          api_client)
+    ledger.settle(wallet_id, payload, data["outcome"])
+
+    # Verify the wallet was funded
+    wallet_data = ledger.checkpoint(api_client, wallet_id)
+    assert len(wallet_data["currencyClips"]) == 1, "Wallet should have one currency clip"
+
+    return {"wallet_id": wallet_id, "currency": currency, "amount": amount}
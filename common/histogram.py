@@ -0,0 +1,63 @@
+"""
+This module provides an HDR-style latency histogram: values are counted in logarithmic
+buckets with a bounded relative error, so memory stays constant however many samples a
+load run records and percentiles are accurate to about 1%.
+"""
+
+import math
+import threading
+
+
+class LatencyHistogram:
+    """Thread-safe log-bucketed histogram of latencies in seconds."""
+
+    def __init__(self, relative_error=0.01, lowest=1e-6):
+        self._base = math.log1p(2 * relative_error)
+        self._lowest = lowest
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Count one latency sample."""
+        index = int(math.log(max(seconds, self._lowest) / self._lowest) / self._base)
+        with self._lock:
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        """Add all samples of another histogram with the same resolution."""
+        with self._lock:
+            for index, count in other._buckets.items():  # pylint: disable=protected-access
+                self._buckets[index] = self._buckets.get(index, 0) + count
+            self.count += other.count
+            self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """Latency in seconds at the given percentile (0-100), None when empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, math.ceil(self.count * percent / 100))
+            seen = 0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen >= rank:
+                    # midpoint of the bucket, within relative_error of any value in it
+                    value = self._lowest * math.exp((index + 0.5) * self._base)
+                    return min(value, self.max)
+            return self.max
+
+    def summary(self):
+        """p50/p95/p99/max in milliseconds plus the sample count."""
+        def to_ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 3)
+        return {
+            "count": self.count,
+            "p50_ms": to_ms(self.percentile(50)),
+            "p95_ms": to_ms(self.percentile(95)),
+            "p99_ms": to_ms(self.percentile(99)),
+            "max_ms": to_ms(self.max if self.count else None),
+        }
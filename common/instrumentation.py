@@ -0,0 +1,131 @@
+"""
+This module provides request instrumentation for every Wallet API call.
+Each request is recorded with its method, templated route, status, bytes and elapsed time and,
+when tracing is enabled, appended to a trace file as one JSON line. Records are tagged with the
+context of the thread that sent them, requests of background threads (pool refills, token
+refreshes, event streams) are tagged "<background>" instead of the running test.
+"""
+
+import contextvars
+import json
+import re
+import threading
+import time
+
+ROUTE_PATTERNS = [
+    (re.compile(r"/wallet/[^/]+/transaction/[^/]+$"), "/wallet/{id}/transaction/{tid}"),
+    (re.compile(r"/wallet/[^/]+/transaction$"), "/wallet/{id}/transaction"),
+    (re.compile(r"/wallet/[^/]+/transactions$"), "/wallet/{id}/transactions"),
+    (re.compile(r"/wallet/[^/]+$"), "/wallet/{id}"),
+]
+POLL_ROUTE = ("GET", "/wallet/{id}/transaction/{tid}")
+BACKGROUND = "<background>"
+
+_UNSET = object()
+
+
+def route_template(path):
+    """Collapse ids in a path, e.g. /wallet/ab/transaction/cd -> /wallet/{id}/transaction/{tid}."""
+    path = "/" + path.split("?", 1)[0].lstrip("/")
+    for pattern, template in ROUTE_PATTERNS:
+        if pattern.search(path):
+            return pattern.sub(template, path)
+    return path
+
+
+class RequestTracer:
+    """Appends one JSON line per API request to the trace file, tagged with the current
+    context (the running test's node id under pytest). The context is kept per thread: threads
+    started without one report BACKGROUND, work fanned out for the caller keeps its context
+    through `bind`. The trace file is only created once the first request is recorded."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path = None
+        self._file = None
+        self._context = contextvars.ContextVar("trace_context", default=_UNSET)
+
+    @property
+    def context(self):
+        """The current thread's context, None in the main thread outside of any."""
+        context = self._context.get()
+        if context is _UNSET:
+            return None if threading.current_thread() is threading.main_thread() else BACKGROUND
+        return context
+
+    @context.setter
+    def context(self, value):
+        self._context.set(value)
+
+    def bind(self, function):
+        """Wrap the function to run in the caller's context, e.g. on a pool thread."""
+        context = self.context
+
+        def bound(*args, **kwargs):
+            token = self._context.set(context)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._context.reset(token)
+        return bound
+
+    @property
+    def enabled(self):
+        """True while records are written to a trace file."""
+        return self._path is not None
+
+    def open(self, path):
+        """Append records to the given JSONL file from the first recorded request on."""
+        self.close()
+        self._path = path
+
+    def flush(self):
+        """Flush buffered records to the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Flush and close the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+            self._path = None
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def record(self, method, path, status, request_bytes, response_bytes, elapsed,
+               server_timing=None):
+        """Write one request record if tracing is enabled."""
+        if self._path is None:
+            return
+        line = json.dumps({
+            "ts": time.time(),
+            "context": self.context,
+            "method": method,
+            "route": route_template(path),
+            "status": status,
+            "request_bytes": request_bytes,
+            "response_bytes": response_bytes,
+            "elapsed": elapsed,
+            "server_timing": server_timing,
+        })
+        with self._lock:
+            if self._file is None and self._path is not None:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                # pylint: disable-next=consider-using-with
+                self._file = open(self._path, "a", encoding="utf-8")
+            if self._file is not None:
+                self._file.write(line + "\n")
+
+
+TRACER = RequestTracer()
+
+
+def read_trace(paths):
+    """Yield the records of one or more JSONL trace files."""
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
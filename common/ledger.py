@@ -0,0 +1,111 @@
+"""
+This module provides the client-side balance ledger.
+Every transaction is tracked per wallet and currency with Decimal amounts. Each submission
+and outcome updates the expected currencyClips in O(1), and GET /wallet/{walletId} is checked
+against them at checkpoints, so high-volume runs never re-sum their history.
+"""
+
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+import config
+from common.payloads import to_decimal
+from common.snapshots import take_snapshot
+
+ZERO = Decimal("0")
+
+
+def _new_position():
+    return {"balance": ZERO, "pending_credits": ZERO, "pending_debits": ZERO}
+
+
+class Ledger:
+    """Expected balances of one or more wallets.
+    Call submit() before a transaction is sent and settle() once its outcome is known. While a
+    transaction is in flight it widens the range the server balance may be in, so checkpoints
+    hold under load and are exact once nothing is in flight."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # wallet id -> currency -> position
+        self._wallets = defaultdict(lambda: defaultdict(_new_position))
+
+    def submit(self, wallet_id, payload):
+        """Track a transaction that is about to be sent."""
+        with self._lock:
+            position = self._wallets[wallet_id][payload["currency"]]
+            position[f"pending_{payload['type']}s"] += to_decimal(payload["amount"])
+
+    def settle(self, wallet_id, payload, outcome):
+        """Record the outcome of a submitted transaction. Only 'approved' moves funds, any
+        other outcome (e.g. 'denied', or None for a rejected request) just releases it."""
+        amount = to_decimal(payload["amount"])
+        with self._lock:
+            position = self._wallets[wallet_id][payload["currency"]]
+            position[f"pending_{payload['type']}s"] -= amount
+            if outcome == "approved":
+                position["balance"] += amount if payload["type"] == "credit" else -amount
+
+    def in_flight(self, wallet_id):
+        """True while any submitted transaction of the wallet has no recorded outcome."""
+        with self._lock:
+            return any(position["pending_credits"] or position["pending_debits"]
+                       for position in self._wallets[wallet_id].values())
+
+    def expected_clips(self, wallet_id):
+        """Expected {currency: Decimal amount} from the outcomes recorded so far."""
+        with self._lock:
+            return {currency: position["balance"]
+                    for currency, position in self._wallets[wallet_id].items()}
+
+    def checkpoint(self, api_client, wallet_id):
+        """Fetch the wallet and assert every currency clip is consistent with the ledger:
+        equal to the expected amount when nothing is in flight, otherwise within the range the
+        in-flight transactions allow. Missing clips count as zero. Returns the wallet data.
+        The positions are read after the request: every transaction the server applied by then
+        was submitted before it, so it is either still in flight or already settled here."""
+        response = api_client.get_wallet(wallet_id)
+        assert response.status_code == 200, (
+            f"Failed to fetch wallet data, expected 200 but got {response.status_code}"
+        )
+        data = response.json()
+        actual = {clip["currency"]: to_decimal(clip["amount"]) for clip in data["currencyClips"]}
+        with self._lock:
+            mismatches = self._mismatches(wallet_id, actual)
+        assert not mismatches, (
+            f"Wallet {wallet_id} balance does not match the ledger: {'; '.join(mismatches)}"
+        )
+        return data
+
+    def check_wallets(self, api_client, wallet_ids, max_workers=config.HTTP_POOL_SIZE):
+        """Checkpoint many wallets from one concurrent snapshot (common.snapshots) in a single
+        pass over its rows. Returns (snapshot, {wallet_id: [mismatch, ...]}) for the wallets
+        that are inconsistent or could not be fetched. As with checkpoint() the positions are
+        only read, under the lock, once the snapshot is complete."""
+        snapshot = take_snapshot(api_client, wallet_ids, max_workers)
+        actual = defaultdict(dict)
+        for wallet_id, currency, amount in snapshot.rows():
+            actual[wallet_id][currency] = amount
+        mismatches = {wallet_id: [f"failed to fetch wallet: {error}"]
+                      for wallet_id, error in snapshot.errors.items()}
+        with self._lock:
+            for wallet_id in snapshot.wallets:
+                wallet_mismatches = self._mismatches(wallet_id, actual[wallet_id])
+                if wallet_mismatches:
+                    mismatches[wallet_id] = wallet_mismatches
+        return snapshot, mismatches
+
+    def _mismatches(self, wallet_id, actual):
+        """Currencies where the {currency: amount} `actual` falls outside the expected range."""
+        positions = self._wallets.get(wallet_id, {})
+        mismatches = []
+        for currency in sorted(set(actual) | set(positions)):
+            position = positions.get(currency) or _new_position()
+            low = position["balance"] - position["pending_debits"]
+            high = position["balance"] + position["pending_credits"]
+            amount = actual.get(currency, ZERO)
+            if not low <= amount <= high:
+                expected = low if low == high else f"{low}..{high}"
+                mismatches.append(f"{currency}: wallet holds {amount}, expected {expected}")
+        return mismatches
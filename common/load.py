@@ -0,0 +1,113 @@
+"""
+This module provides a load-submission engine that fires transaction POSTs against
+/wallet/{walletId}/transaction in parallel.
+Two backends are available: a thread pool over the shared WalletApiClient, which submits
+through the idempotent retry layer (common.submission), and an asyncio backend built on httpx
+that sends each POST once. Both hold every worker at a start barrier so the first wave of
+requests really overlaps on the server.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from common import submission
+from common.instrumentation import TRACER
+
+BACKENDS = ("threads", "asyncio")
+
+
+def submit_transactions(api_client, wallet_id, payloads, backend="threads",
+                        concurrency=config.HTTP_POOL_SIZE):
+    """
+    Submits all payloads to the wallet in parallel with at most `concurrency` requests in flight.
+    Returns {"results": [...], "elapsed": <seconds>, "throughput": <requests per second>} where
+    results follow the payload order and hold the payload, status_code, body and latency.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    payloads = list(payloads)
+    if not payloads:
+        return {"results": [], "elapsed": 0.0, "throughput": 0.0}
+    concurrency = max(1, min(concurrency, len(payloads)))
+
+    start_time = time.perf_counter()
+    if backend == "threads":
+        results = _submit_threaded(api_client, wallet_id, payloads, concurrency)
+    else:
+        results = asyncio.run(_submit_async(api_client, wallet_id, payloads, concurrency))
+    elapsed = time.perf_counter() - start_time
+    return {"results": results, "elapsed": elapsed, "throughput": len(payloads) / elapsed}
+
+
+def _result(payload, status_code, body, latency):
+    return {"payload": payload, "status_code": status_code, "body": body, "latency": latency}
+
+
+def _json_or_none(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def _submit_threaded(api_client, wallet_id, payloads, concurrency):
+    """Thread-pool backend: each worker waits at the barrier, then drains a shared index."""
+    results = [None] * len(payloads)
+    barrier = threading.Barrier(concurrency)
+    next_index = iter(range(len(payloads)))
+    index_lock = threading.Lock()
+
+    def worker():
+        barrier.wait()
+        while True:
+            with index_lock:
+                index = next(next_index, None)
+            if index is None:
+                return
+            sent = time.perf_counter()
+            response = submission.submit_transaction(api_client, wallet_id, payloads[index])
+            results[index] = _result(payloads[index], response.status_code,
+                                     _json_or_none(response), time.perf_counter() - sent)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(TRACER.bind(worker)) for _ in range(concurrency)]
+        for future in futures:
+            future.result()
+    return results
+
+
+async def _submit_async(api_client, wallet_id, payloads, concurrency):
+    """asyncio backend: all tasks wait on one start event, a semaphore bounds the overlap."""
+    try:
+        import httpx  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError("The asyncio backend requires httpx, run `pip install httpx`") from error
+
+    start = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=api_client.base_url,
+                                 headers=api_client.headers(),
+                                 timeout=api_client.timeout,
+                                 limits=limits) as client:
+
+        async def submit(payload):
+            await start.wait()
+            async with semaphore:
+                path = f"/wallet/{wallet_id}/transaction"
+                sent = time.perf_counter()
+                response = await client.post(path, json=payload)
+                latency = time.perf_counter() - sent
+                TRACER.record("POST", path, response.status_code, len(response.request.content),
+                              len(response.content), latency,
+                              response.headers.get("Server-Timing"))
+                return _result(payload, response.status_code, _json_or_none(response), latency)
+
+        tasks = [asyncio.create_task(submit(payload)) for payload in payloads]
+        await asyncio.sleep(0)  # let every task reach the start event
+        start.set()
+        return list(await asyncio.gather(*tasks))
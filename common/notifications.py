@@ -0,0 +1,149 @@
+"""
+This module provides event-driven settlement notifications.
+A SettlementListener subscribes once to the server's event stream (server-sent events on
+GET /transactions/events) and resolves a future per transaction when its terminal-state event
+arrives, so waiting on N transactions costs one long-lived request instead of N x seconds of
+polling. When the server offers no push channel the listener reports itself unavailable and
+callers fall back to polling (see helpers.wait_for_transactions); when the stream ends, every
+outstanding future fails with StreamClosedError so waiters fall back at once.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+
+import requests
+import urllib3
+
+from common.instrumentation import TRACER
+
+EVENTS_PATH = "/transactions/events"
+
+
+class StreamClosedError(ConnectionError):
+    """Set on the futures still outstanding when the event stream ends."""
+
+
+class SettlementListener:  # pylint: disable=too-many-instance-attributes
+    """Collects terminal-state events from the Wallet API event stream."""
+
+    def __init__(self, api_client, path=EVENTS_PATH, history=100_000):
+        self.api_client = api_client
+        self.path = path
+        self.history = history
+        self.available = False
+        self._lock = threading.Lock()
+        self._settled = OrderedDict()  # transaction id -> (event, arrival time), bounded
+        self._futures = {}
+        self._response = None
+        self._thread = None
+
+    def start(self, timeout=5):
+        """Subscribe to the event stream. Leaves `available` False when the server has none."""
+        response = self._open(timeout)
+        auth = self.api_client.auth
+        if response is not None and response.status_code == 401 and auth is not None:
+            response.close()
+            auth.refresh(stale_token=auth.token)  # same single retry as WalletApiClient
+            response = self._open(timeout)
+        if response is None:
+            return self
+        if response.status_code != 200:
+            response.close()
+            return self
+        self._response = response
+        self.available = True
+        self._thread = threading.Thread(target=self._read_events, args=(response,), daemon=True,
+                                        name="settlement-listener")
+        self._thread.start()
+        return self
+
+    def _open(self, timeout):
+        """Send the subscription request through the client's session, so its proxies and CA
+        bundle apply. Returns the streamed response or None."""
+        started = time.perf_counter()
+        try:
+            response = self.api_client.session.get(
+                self.api_client.url(self.path), stream=True,
+                timeout=(timeout, None),  # the stream stays idle between events
+                headers={**self.api_client.headers(), "Accept": "text/event-stream"})
+        except requests.RequestException:
+            return None
+        TRACER.record("GET", self.path, response.status_code, 0, None,
+                      time.perf_counter() - started)
+        return response
+
+    def stop(self):
+        """Close the stream and stop the reader thread."""
+        self.available = False
+        if self._response is not None:
+            try:
+                self._response.raw.shutdown()  # the reader sees the end of the stream
+            except (OSError, RuntimeError, ValueError):
+                self._response.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._response is not None:
+            self._response.close()  # only once the reader is done with it
+            self._response = None
+
+    def future(self, transaction_id):
+        """Future resolved with (terminal payload, arrival time) of the transaction. Each
+        event is handed out once. Fails with StreamClosedError once the stream has ended."""
+        with self._lock:
+            if transaction_id in self._settled:
+                future = Future()
+                future.set_result(self._settled.pop(transaction_id))
+                return future
+            if not self.available:
+                future = Future()
+                future.set_exception(StreamClosedError("the settlement event stream is closed"))
+                return future
+            return self._futures.setdefault(transaction_id, Future())
+
+    def forget(self, transaction_id):
+        """Drop the future of a transaction the caller gave up on."""
+        with self._lock:
+            self._futures.pop(transaction_id, None)
+
+    def wait(self, transaction_ids, timeout):
+        """Wait up to `timeout` seconds, or until the stream ends, for the transactions'
+        terminal events. Returns {transaction_id: (payload, arrival time)} for those that
+        arrived; the futures of the others are forgotten."""
+        futures = {transaction_id: self.future(transaction_id)
+                   for transaction_id in transaction_ids}
+        wait(futures.values(), timeout=timeout)
+        for transaction_id, future in futures.items():
+            if not future.done():
+                self.forget(transaction_id)
+        return {transaction_id: future.result() for transaction_id, future in futures.items()
+                if future.done() and future.exception() is None}
+
+    def _read_events(self, response):
+        try:
+            # byte-wise, a buffered read would hold events back until a full chunk arrived
+            for line in response.iter_lines(chunk_size=1):
+                if line.startswith(b"data:"):
+                    self._deliver(json.loads(line[len(b"data:"):]))
+        except (OSError, ValueError, requests.RequestException, urllib3.exceptions.HTTPError):
+            pass
+        finally:
+            with self._lock:
+                self.available = False
+                futures, self._futures = list(self._futures.values()), {}
+            for future in futures:
+                future.set_exception(StreamClosedError("the settlement event stream ended"))
+
+    def _deliver(self, event):
+        settled = (event, time.monotonic())
+        with self._lock:
+            future = self._futures.pop(event["transactionId"], None)
+            if future is None:  # nobody is waiting yet, keep it for a later future()
+                self._settled[event["transactionId"]] = settled
+                if len(self._settled) > self.history:
+                    self._settled.popitem(last=False)
+        if future is not None:
+            future.set_result(settled)
@@ -0,0 +1,153 @@
+"""
+This module provides the payload matrix for negative transaction tests.
+Invalid POST /wallet/{walletId}/transaction payloads are built combinatorially from per-field
+variants (missing fields, wrong types, boundary amounts, unknown currencies, precision edge
+cases) and extra keys. Every case is submitted concurrently and its status code is collected
+into a table, so one run reports every case the API accepts instead of stopping at the first.
+Throttled answers are retried after their Retry-After, only the final status is recorded.
+Amounts whose validity the spec leaves open (more than two decimal places) are recorded
+without an expected status.
+"""
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import config
+from common import polling
+from common.instrumentation import TRACER
+
+MISSING = object()  # the field is left out of the payload
+
+# field -> [(label, value)] of values the API must reject
+INVALID_VALUES = {
+    "currency": [
+        ("unknown code", "XXX"),
+        ("lowercase", "usd"),
+        ("padded", " USD "),
+        ("empty", ""),
+        ("null", None),
+        ("number", 840),
+        ("list", ["USD"]),
+    ],
+    "amount": [
+        ("zero", 0),
+        ("negative zero", -0.0),
+        ("smallest negative", -0.01),
+        ("negative", -1),
+        ("string", "1"),
+        ("decimal string", "1.00"),
+        ("null", None),
+        ("boolean", True),
+        ("list", [1]),
+        ("object", {"value": 1}),
+    ],
+    "type": [
+        ("unknown", "refund"),
+        ("capitalised", "Credit"),
+        ("empty", ""),
+        ("null", None),
+        ("number", 1),
+    ],
+}
+
+# The spec does not fix the precision of transaction amounts, only that balances are kept
+# with up to 4 decimal places, so the answer to these is recorded but not asserted
+UNSPECIFIED_AMOUNTS = [
+    ("three decimals", 0.001),
+    ("half cent", 1.005),
+    ("four decimals", 0.0001),
+    ("exponent below a cent", 1e-7),
+]
+
+EXTRA_KEYS = [
+    ("unknown key", "invalid_key", "invalid_value"),
+    ("client id", "transactionId", "00000000-0000-0000-0000-000000000000"),
+    ("wallet id", "walletId", "00000000-0000-0000-0000-000000000000"),
+]
+
+NON_OBJECT_BODIES = [
+    ("array body", []),
+    ("string body", "credit"),
+    ("number body", 1),
+]
+
+
+def build_cases(currency="USD", amount=1):
+    """Every invalid payload as {"case": label, "payload": payload, "expected": 400}.
+    Each field takes its valid values (`currency`, `amount`, credit and debit), its invalid
+    values or is missing, combined with no or one extra key; only all-valid combinations
+    without an extra key are left out. The UNSPECIFIED_AMOUNTS follow as otherwise valid
+    credits and debits with "expected": None."""
+    valid = {"currency": [currency], "amount": [amount], "type": ["credit", "debit"]}
+    pools = {field: [(None, value) for value in values] + INVALID_VALUES[field]
+             + [("missing", MISSING)] for field, values in valid.items()}
+    extras = [(None, None, None)] + EXTRA_KEYS
+
+    cases = [{"case": label, "payload": body, "expected": 400}
+             for label, body in NON_OBJECT_BODIES]
+    for *variants, extra in itertools.product(*pools.values(), extras):
+        labels = [f"{field} {label}" for field, (label, _) in zip(pools, variants)
+                  if label is not None]
+        if extra[0] is not None:
+            labels.append(extra[0])
+        if not labels:
+            continue
+        payload = {field: value for field, (_, value) in zip(pools, variants)
+                   if value is not MISSING}
+        if extra[0] is not None:
+            payload[extra[1]] = extra[2]
+        cases.append({"case": ", ".join(labels), "payload": payload, "expected": 400})
+    cases += [{"case": f"amount {label}, {transaction_type}",
+               "payload": {"currency": currency, "amount": value, "type": transaction_type},
+               "expected": None}
+              for label, value in UNSPECIFIED_AMOUNTS for transaction_type in valid["type"]]
+    return cases
+
+
+def run_cases(api_client, wallet_id, cases, max_workers=config.HTTP_POOL_SIZE,
+              max_throttled=5):
+    """POST every case to the wallet concurrently and return the result table: the cases
+    with the "status" they were answered with (or the exception name) and, for a created
+    transaction, its "transactionId". A case answered 429,
+    or 503 with a Retry-After, is sent again after the server's delay (an exponential backoff
+    without one) up to `max_throttled` times, so a rate limit does not show up as a result."""
+    strategy = polling.ExponentialBackoff(fast_attempts=0, initial=0.5, cap=10.0)
+
+    def submit(case):
+        for attempt in range(max_throttled + 1):
+            try:
+                response = api_client.post(f"/wallet/{wallet_id}/transaction",
+                                           json=case["payload"])
+            except requests.RequestException as error:
+                return {**case, "status": type(error).__name__}
+            throttled = response.status_code == 429 or polling.is_throttled(response)
+            if not throttled or attempt == max_throttled:
+                break
+            delay = polling.retry_after(response)
+            time.sleep(delay if delay is not None else strategy.delay(attempt))
+        row = {**case, "status": response.status_code}
+        if response.status_code == 200:
+            row["transactionId"] = response.json().get("transactionId")
+        return row
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(TRACER.bind(submit), cases))
+
+
+def unexpected(table):
+    """Rows of the result table whose status differs from the expected one, rows without an
+    expected status are never unexpected."""
+    return [row for row in table
+            if row["expected"] is not None and row["status"] != row["expected"]]
+
+
+def format_table(rows, limit=50):
+    """The rows as aligned 'status  expected  case  payload' lines, at most `limit` of them."""
+    lines = [f"{row['status']!s:>8}  {row['expected']!s:>8}  {row['case']}  {row['payload']!r}"
+             for row in rows[:limit]]
+    if len(rows) > limit:
+        lines.append(f"... and {len(rows) - limit} more")
+    return "\n".join([f"{'status':>8}  {'expected':>8}  case  payload", *lines])
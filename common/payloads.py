@@ -0,0 +1,36 @@
+"""
+This module provides the transaction payload shapes used by the tests, fixtures and load tests,
+so every caller builds requests the same way.
+"""
+
+import random
+from decimal import Decimal
+
+CURRENCIES = ["USD", "EUR", "GBP"]
+
+
+def random_amount(low, high):
+    """Random amount between low and high with two decimal places."""
+    return round(random.uniform(low, high), 2)
+
+
+def to_decimal(amount):
+    """Exact Decimal of an API amount, e.g. 0.1 -> Decimal("0.1") rather than its float."""
+    return Decimal(str(amount))
+
+
+def transaction_payload(currency, amount, transaction_type="credit"):
+    """Payload for POST /wallet/{walletId}/transaction."""
+    return {"currency": currency, "amount": amount, "type": transaction_type}
+
+
+def random_credit(currency="USD", low=1, high=10):
+    """Credit payload with a random amount, as used by the high-volume tests."""
+    return transaction_payload(currency, random_amount(low, high), "credit")
+
+
+def transaction_stream(currency="USD", debit_ratio=0.0, low=1, high=10):
+    """Endless stream of random credits and, with probability `debit_ratio`, debits."""
+    while True:
+        transaction_type = "debit" if random.random() < debit_ratio else "credit"
+        yield transaction_payload(currency, random_amount(low, high), transaction_type)
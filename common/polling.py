@@ -0,0 +1,110 @@
+"""
+This module provides pluggable polling strategies for waiting on transaction state changes.
+A strategy only decides how long to wait before the next poll, deadlines and the actual
+requests stay in common.helpers.
+"""
+
+import math
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class FixedInterval:
+    """Poll every `interval` seconds."""
+
+    def __init__(self, interval=1):
+        self.interval = interval
+
+    def delay(self, attempt):  # pylint: disable=unused-argument
+        """Seconds to wait after the given (zero-based) attempt."""
+        return self.interval
+
+
+class ExponentialBackoff:
+    """Poll quickly for the first few attempts to catch sub-second completions, then back off
+    exponentially with jitter up to `cap` seconds."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, fast_interval=0.1, fast_attempts=5, initial=0.25, factor=2.0, cap=5.0,
+                 jitter=0.2):
+        self.fast_interval = fast_interval
+        self.fast_attempts = fast_attempts
+        self.initial = initial
+        self.factor = factor
+        self.cap = cap
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        """Seconds to wait after the given (zero-based) attempt."""
+        if attempt < self.fast_attempts:
+            return self.fast_interval
+        steps = attempt - self.fast_attempts
+        if self.factor > 1:  # no more steps than it takes to reach the cap, or it overflows
+            steps = min(steps, math.ceil(math.log(self.cap / self.initial, self.factor))
+                        if 0 < self.initial < self.cap else 0)
+        backoff = min(self.initial * self.factor ** steps, self.cap)
+        backoff *= 1 + random.uniform(-self.jitter, self.jitter)
+        return min(backoff, self.cap)
+
+
+def default_strategy():
+    """Strategy used by the helpers when none is given."""
+    return ExponentialBackoff()
+
+
+def retry_after(response):
+    """Return the server's Retry-After header in seconds, or None if absent/unparseable."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def next_delay(strategy, attempt, deadline, response=None):
+    """Delay before the next poll: the server's Retry-After wins over the strategy, and the
+    result never sleeps past the monotonic `deadline`."""
+    delay = retry_after(response)
+    if delay is None:
+        delay = strategy.delay(attempt)
+    return max(min(delay, deadline - time.monotonic()), 0.0)
+
+
+class PollStats:
+    """Per-transaction counters of poll requests issued and time to reach a terminal state."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.transactions = {}
+
+    def _entry(self, transaction_id):
+        return self.transactions.setdefault(transaction_id,
+                                            {"requests": 0, "time_to_terminal": None})
+
+    def record_request(self, transaction_id):
+        """Count one status request for the transaction."""
+        with self._lock:
+            self._entry(transaction_id)["requests"] += 1
+
+    def record_terminal(self, transaction_id, elapsed):
+        """Record the seconds it took the transaction to reach its terminal state."""
+        with self._lock:
+            self._entry(transaction_id)["time_to_terminal"] = elapsed
+
+    @property
+    def total_requests(self):
+        """Total status requests across all transactions."""
+        return sum(entry["requests"] for entry in self.transactions.values())
+
+
+def is_throttled(response):
+    """True when the server asked us to back off rather than failing the request."""
+    return response.status_code in (429, 503) and retry_after(response) is not None
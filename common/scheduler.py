@@ -0,0 +1,226 @@
+"""
+This module provides the paced request scheduler.
+POSTs to /wallet/{walletId}/transaction are released by a token bucket at a target rate across
+many wallets, independent of how fast the server answers. 429 responses pause the throttled
+wallet for its Retry-After (or an exponential backoff when the header is missing), are retried
+later and lower the allowed rate additive-increase/multiplicative-decrease style. The server's
+throttle threshold can then be found without overloading it, and throttling never shows up
+as a test failure.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import payloads, polling
+from common.histogram import LatencyHistogram
+from common.instrumentation import TRACER
+
+
+class TokenBucket:
+    """Releases tokens at `rate` per second, allowing bursts of up to `burst` tokens."""
+
+    def __init__(self, rate, burst=1.0):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        """Change the release rate, tokens already accrued are kept."""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class AdaptiveRate:  # pylint: disable=too-many-instance-attributes
+    """Adjusts a bucket's rate: every throttled response halves it (at most once per
+    `cooldown` seconds, so one burst of 429s counts once) and accepted requests raise it by
+    about `increase` requests per second each second, back up to `target`."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, bucket, target, decrease=0.5, increase=None, cooldown=1.0, floor=1.0):
+        self.bucket = bucket
+        self.target = target
+        self.decrease = decrease
+        self.increase = increase if increase is not None else max(target / 20, 1.0)
+        self.cooldown = cooldown
+        self.floor = min(floor, target)
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    def on_success(self):
+        """Record an accepted request."""
+        with self._lock:
+            rate = self.bucket.rate
+            self.bucket.set_rate(min(self.target, rate + self.increase / rate))
+
+    def on_throttle(self):
+        """Record a throttled request."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                self.bucket.set_rate(max(self.floor, self.bucket.rate * self.decrease))
+
+
+class PacedRun:  # pylint: disable=too-many-instance-attributes
+    """Sends POSTs round-robin over `wallet_ids` at up to `target_rate` per second.
+    `payload_factory(wallet_id)` builds each payload (a random USD credit by default).
+    Raises ValueError without any wallet to send to."""
+
+    # pylint: disable-next=too-many-arguments
+    def __init__(self, api_client, wallet_ids, target_rate, *, payload_factory=None,
+                 workers=64, max_retries=3, adaptive=True):
+        if not wallet_ids:
+            raise ValueError("a paced run needs at least one wallet")
+        self.api_client = api_client
+        self.wallet_ids = wallet_ids
+        self.target_rate = target_rate
+        self.payload_factory = payload_factory or (lambda _: payloads.random_credit())
+        self.workers = workers
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(target_rate)
+        self.controller = AdaptiveRate(self.bucket, target_rate) if adaptive else None
+        self.backoff = polling.ExponentialBackoff(fast_attempts=0, initial=0.5, cap=10)
+        self.retry_after = LatencyHistogram()
+        self.counts = Counter()
+        self.errors = Counter()
+        self.timeline = []  # one sample per second: allowed rate, accepted and throttled so far
+        self._lock = threading.Lock()
+        self._paused_until = {}  # wallet id -> monotonic time its Retry-After or backoff ends
+        self._retries = deque()  # (wallet_id, payload, attempt) of throttled requests
+        self._first_throttle = None  # (monotonic time, accepted count) of the first 429
+        self._next_wallet = 0
+
+    def run(self, duration):
+        """Send for `duration` seconds, wait for the responses and return the report."""
+        start = time.monotonic()
+        deadline = start + duration
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while time.monotonic() < deadline:
+                job, resume_at = self._next_job()
+                if job is None:
+                    time.sleep(max(min(resume_at, deadline) - time.monotonic(), 0.0))
+                    continue
+                self.bucket.acquire()
+                self.counts["sent"] += 1
+                executor.submit(TRACER.bind(self._send), *job)
+                self._sample(start)
+        return self._report(duration, time.monotonic() - start)
+
+    def _send(self, wallet_id, payload, attempt):
+        try:
+            response = self.api_client.post_transaction(wallet_id, payload)
+        except requests.RequestException as error:
+            with self._lock:
+                self.errors[type(error).__name__] += 1
+            return
+        if response.status_code != 429:
+            with self._lock:
+                if response.status_code == 200:
+                    self.counts["accepted"] += 1
+                else:
+                    self.errors[str(response.status_code)] += 1
+            if self.controller is not None and response.status_code == 200:
+                self.controller.on_success()
+            return
+        delay = polling.retry_after(response)
+        if delay is not None:
+            self.retry_after.record(delay)
+        if self.controller is not None:
+            self.controller.on_throttle()
+        with self._lock:
+            self.counts["throttled"] += 1
+            if delay is None:
+                self.counts["missing_retry_after"] += 1
+                delay = self.backoff.delay(attempt)
+            if self._first_throttle is None:
+                self._first_throttle = (time.monotonic(), self.counts["accepted"])
+            self._paused_until[wallet_id] = max(self._paused_until.get(wallet_id, 0.0),
+                                                time.monotonic() + delay)
+            if attempt < self.max_retries:
+                self._retries.append((wallet_id, payload, attempt + 1))
+            else:
+                self.counts["gave_up"] += 1
+
+    def _next_job(self):
+        """The next request whose wallet is not paused, or the time the first pause ends."""
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self._retries)):
+                job = self._retries.popleft()
+                if self._paused_until.get(job[0], 0.0) <= now:
+                    self.counts["retried"] += 1
+                    return job, None
+                self._retries.append(job)
+            for _ in range(len(self.wallet_ids)):
+                wallet_id = self.wallet_ids[self._next_wallet % len(self.wallet_ids)]
+                self._next_wallet += 1
+                if self._paused_until.get(wallet_id, 0.0) <= now:
+                    return (wallet_id, self.payload_factory(wallet_id), 0), None
+            return None, min(self._paused_until.values())
+
+    def _sample(self, start):
+        second = int(time.monotonic() - start)
+        if second >= len(self.timeline):
+            with self._lock:
+                self.timeline.append({"second": second,
+                                      "allowed_rate": round(self.bucket.rate, 3),
+                                      "accepted": self.counts["accepted"],
+                                      "throttled": self.counts["throttled"]})
+
+    def _report(self, duration, elapsed):
+        counts = self.counts
+        achieved_rate = counts["accepted"] / elapsed
+        rate_after_throttle = None
+        if self._first_throttle is not None:
+            throttled_at, accepted_before = self._first_throttle
+            rate_after_throttle = round((counts["accepted"] - accepted_before)
+                                        / max(time.monotonic() - throttled_at, 1e-9), 3)
+        return {
+            "target_rate": self.target_rate,
+            "duration": duration,
+            "wallets": len(self.wallet_ids),
+            "sent": counts["sent"],
+            "accepted": counts["accepted"],
+            "throttled": counts["throttled"],
+            "missing_retry_after": counts["missing_retry_after"],
+            "retried": counts["retried"],
+            "gave_up": counts["gave_up"],
+            "unsent_retries": len(self._retries),
+            "errors": dict(self.errors),
+            "achieved_rate": round(achieved_rate, 3),
+            "shortfall": round(max(1 - achieved_rate / self.target_rate, 0.0), 4),
+            "final_allowed_rate": round(self.bucket.rate, 3),
+            "rate_after_throttle": rate_after_throttle,
+            "retry_after": self.retry_after.summary(),
+            "timeline": self.timeline,
+        }
+
+
+def run_paced(api_client, wallet_ids, target_rate, duration, **options):
+    """Run a PacedRun for `duration` seconds and return its throttling report: accepted and
+    throttled counts, the achieved rate and its shortfall against the target, the Retry-After
+    values seen and a per-second timeline of the allowed rate."""
+    return PacedRun(api_client, wallet_ids, target_rate, **options).run(duration)
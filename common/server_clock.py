@@ -0,0 +1,51 @@
+"""
+This module provides control over the Wallet API's clock for timeout and expiry scenarios.
+The stand-in server exposes its clock under /stand-in/clock; against it, a test can jump the
+clock past a timeout or run it faster than real time. The live API has no such endpoint, there
+every call is a no-op and the same test simply waits in real time.
+"""
+
+CLOCK_ROUTE = "/stand-in/clock"
+
+
+class ServerClock:
+    """Handle on the server clock of the API `api_client` talks to."""
+
+    def __init__(self, api_client):
+        self.api_client = api_client
+        self._controllable = None
+        self._initial_speed = None
+
+    @property
+    def controllable(self):
+        """True when the server lets its clock be advanced, probed once on first use."""
+        if self._controllable is None:
+            response = self.api_client.get(CLOCK_ROUTE)
+            self._controllable = response.status_code == 200
+            if self._controllable:
+                self._initial_speed = response.json()["speed"]
+        return self._controllable
+
+    def advance(self, seconds):
+        """Jump the server clock `seconds` ahead. Returns False, without waiting, when the clock
+        cannot be controlled and the time has to pass for real."""
+        return self._control({"advance": seconds})
+
+    def set_speed(self, speed):
+        """Run the server clock `speed` times faster than real time. Returns False when the
+        clock cannot be controlled."""
+        return self._control({"speed": speed})
+
+    def reset_speed(self):
+        """Restore the speed the clock had when it was first probed."""
+        if self._controllable and self._initial_speed is not None:
+            self.set_speed(self._initial_speed)
+
+    def _control(self, body):
+        if not self.controllable:
+            return False
+        response = self.api_client.post(CLOCK_ROUTE, json=body)
+        assert response.status_code == 200, (
+            f"Failed to control the server clock, expected 200 but got {response.status_code}"
+        )
+        return True
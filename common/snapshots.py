@@ -0,0 +1,87 @@
+"""
+This module provides batched wallet-state snapshots.
+The state of many wallets is fetched concurrently through a bounded pool and kept as parallel
+columns (wallet id, currency, amount), one row per currency clip, so thousands of wallets can
+be compared with expected balances or with a previous snapshot in a single pass.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import requests
+
+import config
+from common.instrumentation import TRACER
+from common.payloads import to_decimal
+
+ZERO = Decimal("0")
+
+
+class WalletSnapshot:
+    """Columnar state of a set of wallets. `wallets` lists every wallet that was fetched,
+    including empty ones; wallets that could not be fetched are in `errors` with their status
+    code or exception name."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, wallets, wallet_ids, currencies, amounts, taken_at, errors=None):
+        self.wallets = wallets
+        self.wallet_ids = wallet_ids
+        self.currencies = currencies
+        self.amounts = amounts
+        self.taken_at = taken_at
+        self.errors = errors or {}
+
+    def __len__(self):
+        return len(self.wallet_ids)
+
+    def rows(self):
+        """Iterate (wallet_id, currency, amount) rows."""
+        return zip(self.wallet_ids, self.currencies, self.amounts)
+
+    def balances(self):
+        """{(wallet_id, currency): amount} of every row."""
+        return {(wallet_id, currency): amount for wallet_id, currency, amount in self.rows()}
+
+    def diff(self, previous):
+        """Rows whose amount changed since the `previous` snapshot, as columns wallet_id,
+        currency, before, after and delta. Clips missing on either side count as zero and
+        wallets not fetched by both snapshots are skipped."""
+        before = previous.balances()
+        after = self.balances()
+        compared = set(self.wallets) & set(previous.wallets)
+        columns = {"wallet_id": [], "currency": [], "before": [], "after": [], "delta": []}
+        for key in sorted(set(before) | set(after)):
+            if key[0] not in compared:
+                continue
+            old, new = before.get(key, ZERO), after.get(key, ZERO)
+            if old != new:
+                for column, value in zip(columns, (*key, old, new, new - old)):
+                    columns[column].append(value)
+        return columns
+
+
+def take_snapshot(api_client, wallet_ids, max_workers=config.HTTP_POOL_SIZE):
+    """Fetch every wallet concurrently with at most `max_workers` requests in flight."""
+
+    def fetch(wallet_id):
+        try:
+            response = api_client.get_wallet(wallet_id)
+        except requests.RequestException as error:
+            return wallet_id, None, type(error).__name__
+        if response.status_code != 200:
+            return wallet_id, None, response.status_code
+        return wallet_id, response.json()["currencyClips"], None
+
+    snapshot = WalletSnapshot([], [], [], [], time.time())
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for wallet_id, clips, error in executor.map(TRACER.bind(fetch), wallet_ids):
+            if error is not None:
+                snapshot.errors[wallet_id] = error
+                continue
+            snapshot.wallets.append(wallet_id)
+            for clip in clips:
+                snapshot.wallet_ids.append(wallet_id)
+                snapshot.currencies.append(clip["currency"])
+                snapshot.amounts.append(to_decimal(clip["amount"]))
+    return snapshot
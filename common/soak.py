@@ -0,0 +1,249 @@
+"""
+This module provides the streaming soak run.
+Payloads are drawn from a generator and at most `window` transactions are in flight at any
+time. Each settlement is verified as it arrives and appended to a results file, so memory stays
+flat however many transactions the run submits.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import helpers, submission
+from common.histogram import LatencyHistogram
+from common.ledger import Ledger
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+VERIFIED_FIELDS = ("currency", "amount", "type")
+
+
+def max_rss_mb():
+    """Peak resident memory of this process in MB, None where it can't be measured."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class SoakRun:  # pylint: disable=too-many-instance-attributes
+    """Streams transactions into one wallet with a bounded in-flight window.
+    Settlements come from the settlement `listener` when it is available and from polling the
+    in-flight window otherwise. Transactions still pending after `settle_timeout` seconds are
+    written off as timed out so the window keeps moving. Every report also checkpoints the
+    wallet balance against the ledger."""
+
+    # pylint: disable-next=too-many-arguments
+    def __init__(self, api_client, wallet_id, results_file, *, window=256, workers=32,
+                 listener=None, settle_timeout=60, poll_interval=0.5, report_interval=10,
+                 on_report=None):
+        self.api_client = api_client
+        self.wallet_id = wallet_id
+        self.results_file = results_file
+        self.window = window
+        self.workers = workers
+        self.listener = listener
+        self.settle_timeout = settle_timeout
+        self.poll_interval = poll_interval
+        self.report_interval = report_interval
+        self.on_report = on_report
+        self.counts = Counter()
+        self.ledger = Ledger()
+        self.balance_checks = Counter()  # "passed" / "failed" checkpoints
+        self.histogram = LatencyHistogram()
+        self.max_in_flight = 0
+        self._slots = threading.BoundedSemaphore(window)
+        self._pending = {}  # transaction id -> (payload, sent at), never more than `window`
+        self._lock = threading.Lock()
+        self._file = None
+        self._stop = threading.Event()
+        self._started = None
+        self._last_report = (0.0, 0)  # (monotonic time, settled count)
+
+    @property
+    def in_flight(self):
+        """Transactions accepted by the API and not yet settled or written off."""
+        with self._lock:
+            return len(self._pending)
+
+    def run(self, payload_source, *, limit=None, duration=None):
+        """Submit payloads until the source is exhausted, `limit` transactions were submitted
+        or `duration` seconds passed, wait for the window to drain and return the summary."""
+        self._started = time.monotonic()
+        self._last_report = (self._started, 0)
+        maintainer = threading.Thread(target=self._maintain, daemon=True, name="soak-maintainer")
+        with open(self.results_file, "a", encoding="utf-8") as self._file:
+            maintainer.start()
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for payload in payload_source:
+                    if limit is not None and self.counts["submitted"] >= limit:
+                        break
+                    if duration is not None and time.monotonic() - self._started >= duration:
+                        break
+                    # blocks while `window` transactions are in flight
+                    self._slots.acquire()  # pylint: disable=consider-using-with
+                    with self._lock:
+                        self.counts["submitted"] += 1
+                    executor.submit(self._submit, payload)
+            while self.in_flight:
+                time.sleep(self.poll_interval)
+            self._stop.set()
+            maintainer.join()
+            return self.summary()
+
+    def summary(self):
+        """Totals of the run so far, with a final balance checkpoint."""
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            counts = dict(self.counts)
+        settled = counts.get("approved", 0) + counts.get("denied", 0)
+        return {
+            "elapsed": round(elapsed, 3),
+            "counts": counts,
+            "throughput": round(settled / elapsed, 3) if elapsed else 0.0,
+            "settlement": self.histogram.summary(),
+            "max_in_flight": self.max_in_flight,
+            "max_rss_mb": max_rss_mb(),
+            "balance_verified": self.verify_balance(),
+            "balance_checks": dict(self.balance_checks),
+        }
+
+    def verify_balance(self):
+        """Checkpoint the wallet against the ledger. Transactions with an unknown outcome
+        (timed out, or a request error) stay in flight in the ledger and only widen the
+        accepted range. Returns False when the wallet is inconsistent with it and None when
+        it could not be fetched."""
+        try:
+            self.ledger.checkpoint(self.api_client, self.wallet_id)
+        except requests.RequestException:
+            return None
+        except AssertionError as error:
+            self.balance_checks["failed"] += 1
+            with self._lock:
+                self._file.write(json.dumps({"ts": time.time(), "result": "balance_mismatch",
+                                             "error": str(error)}) + "\n")
+            return False
+        self.balance_checks["passed"] += 1
+        return True
+
+    def _submit(self, payload):
+        sent_at = time.monotonic()
+        self.ledger.submit(self.wallet_id, payload)
+        try:
+            response = self._send(payload)
+            data = response.json() if response.status_code == 200 else None
+            transaction_id = data["transactionId"] if data is not None else None
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            # the transaction may still have been created, its amount stays in flight; any
+            # failure completes it so its window slot is released
+            self._complete(None, payload, sent_at, "error", error=type(error).__name__)
+            return
+        if data is None:
+            self.ledger.settle(self.wallet_id, payload, None)
+            self._complete(None, payload, sent_at, "rejected", status=response.status_code)
+            return
+        with self._lock:
+            self._pending[transaction_id] = (payload, sent_at)
+            self.max_in_flight = max(self.max_in_flight, len(self._pending))
+        if helpers.transaction_settled(data):
+            self._settle(transaction_id, data)
+        elif self.listener is not None and self.listener.available:
+            self.listener.future(transaction_id).add_done_callback(
+                lambda future: self._on_event(transaction_id, future))
+
+    def _on_event(self, transaction_id, future):
+        if future.exception() is None:  # otherwise the stream ended and the poller takes over
+            self._settle(transaction_id, future.result()[0])
+
+    def _send(self, payload):
+        """Submit the transaction; its retry counts are merged into `counts` under the lock,
+        the workers would lose updates to the shared Counter otherwise."""
+        stats = Counter()
+        try:
+            return submission.submit_transaction(self.api_client, self.wallet_id, payload,
+                                                 stats=stats)
+        finally:
+            with self._lock:
+                self.counts.update(stats)
+
+    def _settle(self, transaction_id, data):
+        with self._lock:
+            entry = self._pending.pop(transaction_id, None)
+        if entry is None:
+            return  # already settled by the poller or written off
+        payload, sent_at = entry
+        mismatched = [field for field in VERIFIED_FIELDS if data.get(field) != payload[field]]
+        if mismatched:
+            self._complete(transaction_id, payload, sent_at, "mismatched", fields=mismatched)
+            return
+        self.ledger.settle(self.wallet_id, payload, data.get("outcome"))
+        self.histogram.record(time.monotonic() - sent_at)
+        self._complete(transaction_id, payload, sent_at, data.get("outcome"))
+
+    def _complete(self, transaction_id, payload, sent_at, result, **details):
+        line = json.dumps({"ts": time.time(), "transactionId": transaction_id, "result": result,
+                           "latency": round(time.monotonic() - sent_at, 6), **payload,
+                           **details})
+        with self._lock:
+            self.counts[result] += 1
+            self._file.write(line + "\n")
+        self._slots.release()
+
+    def _maintain(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while not self._stop.wait(self.poll_interval):
+                self._write_off_expired()
+                if self.listener is None or not self.listener.available:
+                    with self._lock:
+                        snapshot = list(self._pending)
+                    list(executor.map(self._poll, snapshot))
+                if time.monotonic() - self._last_report[0] >= self.report_interval:
+                    self._report()
+
+    def _poll(self, transaction_id):
+        try:
+            response = self.api_client.get_transaction(self.wallet_id, transaction_id)
+        except requests.RequestException:
+            return
+        if response.status_code == 200 and helpers.transaction_settled(response.json()):
+            self._settle(transaction_id, response.json())
+
+    def _write_off_expired(self):
+        cutoff = time.monotonic() - self.settle_timeout
+        with self._lock:
+            expired = [(transaction_id, self._pending.pop(transaction_id))
+                       for transaction_id, (_, sent_at) in list(self._pending.items())
+                       if sent_at < cutoff]
+        for transaction_id, (payload, sent_at) in expired:
+            if self.listener is not None:
+                self.listener.forget(transaction_id)
+            self._complete(transaction_id, payload, sent_at, "timed_out")
+
+    def _report(self):
+        now = time.monotonic()
+        with self._lock:
+            self._file.flush()
+            counts = dict(self.counts)
+            in_flight = len(self._pending)
+        settled = counts.get("approved", 0) + counts.get("denied", 0)
+        last_time, last_settled = self._last_report
+        self._last_report = (now, settled)
+        if self.on_report is not None:
+            self.on_report({
+                "elapsed": round(now - self._started, 3),
+                "submitted": counts.get("submitted", 0),
+                "settled": settled,
+                "in_flight": in_flight,
+                "rolling_throughput": round((settled - last_settled) / (now - last_time), 3),
+                "max_rss_mb": max_rss_mb(),
+                "balance_consistent": self.verify_balance(),
+            })
@@ -0,0 +1,237 @@
+"""
+This module provides idempotent transaction submission.
+Every POST /wallet/{walletId}/transaction carries a client-generated Idempotency-Key. A
+request that never reached the server (connect timeout, 429) is simply sent again. After an
+ambiguous failure (a timeout or dropped connection once the request was sent, or a 5xx) the
+transaction is looked for before anything is resent: by its key where the server supports key
+lookups (probed once per client), otherwise in the wallet's paginated transaction history
+(GET /wallet/{walletId}/transactions) by currency, amount, type and submission time, leaving
+out transactions other submissions of this process already resolved to. It is resubmitted only
+when the server demonstrably has no record of it; when the history cannot be read or is
+inconclusive, e.g. while an identical payload is being submitted to the same wallet,
+AmbiguousSubmissionError is raised, so a retry never double-credits a wallet.
+"""
+
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+import config
+from common import polling
+from common.payloads import to_decimal
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+CLOCK_SKEW = timedelta(seconds=30)  # tolerated difference between our clock and the server's
+MAX_HISTORY_PAGES = 20
+MAX_CLAIMED = 100_000
+
+_KEY_LOOKUP = weakref.WeakKeyDictionary()  # api_client -> whether the server resolves keys
+_CLAIMS_LOCK = threading.Lock()
+_CLAIMED = OrderedDict()  # ids of transactions submissions resolved to, oldest first, bounded
+_IN_FLIGHT = Counter()  # (wallet id, currency, type, amount) -> running submissions
+
+
+class AmbiguousSubmissionError(requests.RequestException):
+    """Raised when it is still unknown whether a transaction was created after every attempt.
+    Callers that handle request errors treat it as one; the key allows a later lookup."""
+
+    def __init__(self, wallet_id, key, cause):
+        super().__init__(f"Transaction with idempotency key {key} on wallet {wallet_id} may or "
+                         f"may not exist: {cause}")
+        self.wallet_id = wallet_id
+        self.key = key
+
+
+def new_key():
+    """A fresh idempotency key."""
+    return str(uuid.uuid4())
+
+
+def lookup_transaction(api_client, wallet_id, key):
+    """Fetch the transaction created with the idempotency key, 404 when there is none."""
+    return api_client.get(f"/wallet/{wallet_id}/transaction", params={"idempotencyKey": key})
+
+
+def key_lookup_supported(api_client, wallet_id):
+    """True when the server resolves idempotency keys, probed once per client: a server that
+    has the lookup route rejects a lookup without a key with 400, the Wallet API spec has no
+    such route and answers 404 or 405."""
+    if api_client not in _KEY_LOOKUP:
+        response = api_client.get(f"/wallet/{wallet_id}/transaction")
+        _KEY_LOOKUP[api_client] = response.status_code == 400
+    return _KEY_LOOKUP[api_client]
+
+
+def find_in_history(api_client, wallet_id, payload, since):
+    """Transactions of the wallet's history matching the payload's currency, amount and type
+    created at or after `since` (an aware datetime). Returns the failed response when the
+    history cannot be read."""
+    amount = to_decimal(payload["amount"])
+    matches = []
+    for page in range(1, MAX_HISTORY_PAGES + 1):
+        response = api_client.get(f"/wallet/{wallet_id}/transactions",
+                                  params={"page": page, "startDate": _iso(since)})
+        if response.status_code != 200:
+            return response
+        data = response.json()
+        matches += [transaction for transaction in data.get("transactions", [])
+                    if (transaction.get("currency"), transaction.get("type"))
+                    == (payload["currency"], payload["type"])
+                    and to_decimal(transaction.get("amount")) == amount
+                    and _created_since(transaction, since)]
+        if not data.get("transactions") or page >= data.get("totalPages", page):
+            return matches
+    return matches
+
+
+def _iso(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _created_since(transaction, since):
+    """False only for a transaction whose ISO-8601 createdAt is before `since`."""
+    try:
+        created = datetime.fromisoformat(str(transaction.get("createdAt")).replace("Z", "+00:00"))
+    except ValueError:
+        return True  # no comparable timestamp, the startDate filter has to do
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created >= since
+
+
+def _shape(wallet_id, payload):
+    """What a history match can tell submissions apart by, besides the submission time."""
+    return wallet_id, payload.get("currency"), payload.get("type"), str(payload.get("amount"))
+
+
+def _claim(response):
+    """Remember the transaction a submission resolved to, history matches skip it."""
+    try:
+        transaction_id = response.json()["transactionId"] if response.status_code == 200 else None
+    except (ValueError, TypeError, KeyError):
+        transaction_id = None
+    if transaction_id is None:
+        return
+    with _CLAIMS_LOCK:
+        _CLAIMED[transaction_id] = None
+        if len(_CLAIMED) > MAX_CLAIMED:
+            _CLAIMED.popitem(last=False)
+
+
+def _post(api_client, wallet_id, payload, headers):
+    """Send the POST once and return (response, failure, ambiguous): the response when it is
+    final, otherwise the exception or retryable response and whether the transaction may have
+    been created."""
+    try:
+        response = api_client.post(f"/wallet/{wallet_id}/transaction", json=payload,
+                                   headers=headers)
+    except requests.ConnectTimeout as error:
+        return None, error, False  # the request was never sent
+    except requests.RequestException as error:
+        return None, error, True
+    if response.status_code == 429:
+        return None, response, False
+    if response.status_code >= 500:
+        return None, response, True
+    return response, None, False
+
+
+def _reconcile(api_client, wallet_id, payload, key, since):
+    """Look for the transaction an ambiguous POST may have created. Returns (response, failure):
+    the response describing the transaction when it exists, (None, None) when the server has
+    no record of it, or the retryable failure when the lookup itself failed. Raises
+    AmbiguousSubmissionError when the server cannot tell."""
+    if key_lookup_supported(api_client, wallet_id):
+        found = lookup_transaction(api_client, wallet_id, key)
+        if found.status_code in (200, 404):
+            return (found, None) if found.status_code == 200 else (None, None)
+        return None, found
+    matches = find_in_history(api_client, wallet_id, payload, since - CLOCK_SKEW)
+    if isinstance(matches, requests.Response):
+        if matches.status_code == 429 or matches.status_code >= 500:
+            return None, matches
+        raise AmbiguousSubmissionError(wallet_id, key, "transaction history unavailable "
+                                                       f"(HTTP {matches.status_code})")
+    with _CLAIMS_LOCK:
+        matches = [transaction for transaction in matches
+                   if transaction.get("transactionId") not in _CLAIMED]
+        siblings = _IN_FLIGHT[_shape(wallet_id, payload)] - 1
+    if not matches:
+        return None, None
+    if siblings:  # a match may be the transaction of an identical submission still running
+        raise AmbiguousSubmissionError(wallet_id, key, f"{siblings} identical submissions "
+                                                       "in flight")
+    if len(matches) > 1:
+        raise AmbiguousSubmissionError(wallet_id, key, f"{len(matches)} matching transactions "
+                                                       "in the history")
+    found = api_client.get(f"/wallet/{wallet_id}/transaction/{matches[0]['transactionId']}")
+    return (found, None) if found.status_code == 200 else (None, found)
+
+
+# pylint: disable-next=too-many-arguments
+def submit_transaction(api_client, wallet_id, payload, *, key=None,
+                       max_attempts=config.SUBMIT_MAX_ATTEMPTS, strategy=None,
+                       timeout=config.DEFAULT_API_TIMEOUT, stats=None):
+    """POST the transaction at most once in effect and return the response of the request
+    that settled its fate: the 200 of the POST or of the lookup that found it, or a definitive
+    rejection such as 400. Retries and reconciliations are counted in the optional `stats`
+    Counter. Raises AmbiguousSubmissionError when the outcome is still unknown at the end."""
+    shape = _shape(wallet_id, payload)
+    with _CLAIMS_LOCK:
+        _IN_FLIGHT[shape] += 1
+    try:
+        response = _submit(api_client, wallet_id, payload, key, max_attempts, strategy, timeout,
+                           stats)
+        _claim(response)  # before it stops counting as in flight
+    finally:
+        with _CLAIMS_LOCK:
+            _IN_FLIGHT[shape] -= 1
+            if not _IN_FLIGHT[shape]:
+                del _IN_FLIGHT[shape]
+    return response
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments,too-many-locals
+def _submit(api_client, wallet_id, payload, key, max_attempts, strategy, timeout, stats):
+    key = key or new_key()
+    strategy = strategy or polling.ExponentialBackoff(fast_attempts=0, initial=0.25, cap=5.0)
+    stats = stats if stats is not None else Counter()
+    deadline = time.monotonic() + timeout
+    since = datetime.now(timezone.utc)
+    ambiguous = False
+    failure = None  # the last exception or retryable response
+    for attempt in range(max_attempts):
+        if attempt:
+            last_response = failure if isinstance(failure, requests.Response) else None
+            time.sleep(polling.next_delay(strategy, attempt - 1, deadline, last_response))
+            stats["retried"] += 1
+        if ambiguous:
+            try:
+                found, failure = _reconcile(api_client, wallet_id, payload, key, since)
+            except AmbiguousSubmissionError:
+                raise
+            except requests.RequestException as error:
+                failure = error
+                continue
+            if found is not None:
+                stats["reconciled"] += 1
+                return found
+            if failure is not None:
+                continue
+            # the server has no record of it, resubmitting with the same key is safe
+        response, failure, ambiguous = _post(api_client, wallet_id, payload,
+                                             {IDEMPOTENCY_HEADER: key})
+        if response is not None:
+            return response
+
+    if ambiguous:
+        cause = failure if isinstance(failure, Exception) else f"HTTP {failure.status_code}"
+        raise AmbiguousSubmissionError(wallet_id, key, cause)
+    if isinstance(failure, Exception):
+        raise failure
+    return failure
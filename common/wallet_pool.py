@@ -0,0 +1,78 @@
+"""
+This module provides a pool of pre-funded wallets.
+Wallets are funded in parallel in the background and handed out on demand, so tests don't
+pay the funding and settlement latency on their own critical path.
+"""
+
+import queue
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from common import helpers, payloads
+
+
+class FundedWalletPool:  # pylint: disable=too-many-instance-attributes
+    """Keeps up to `size` funded wallets ready and refills in the background once fewer than
+    `low_watermark` are ready or being funded."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, api_client, size=config.WALLET_POOL_SIZE,
+                 low_watermark=config.WALLET_POOL_LOW_WATERMARK,
+                 currencies=config.WALLET_POOL_CURRENCIES,
+                 amount_range=config.WALLET_POOL_AMOUNT_RANGE):
+        self.api_client = api_client
+        self.size = size
+        self.low_watermark = low_watermark
+        self.currencies = currencies
+        self.amount_range = amount_range
+        self._ready = queue.Queue()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="wallet-pool")
+
+    def start(self):
+        """Start funding the first `size` wallets in parallel."""
+        self._refill()
+        return self
+
+    def acquire(self, timeout=config.DEFAULT_API_TIMEOUT):
+        """Take a funded wallet, waiting up to `timeout` seconds for one to be ready.
+        Returns {"wallet_id": ..., "currency": ..., "amount": ...} like helpers.fund_wallet."""
+        try:
+            wallet = self._ready.get(timeout=timeout)
+        except queue.Empty as error:
+            raise TimeoutError(f"No funded wallet became ready within {timeout} seconds") from error
+        self._refill()
+        if isinstance(wallet, Exception):
+            raise wallet
+        return wallet
+
+    def close(self):
+        """Stop funding, wallets still being funded are abandoned."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _refill(self):
+        with self._lock:
+            available = self._ready.qsize() + self._in_flight
+            if available >= self.low_watermark:
+                return
+            missing = self.size - available
+            self._in_flight += missing
+        for _ in range(missing):
+            self._executor.submit(self._fund_one)
+
+    def _fund_one(self):
+        currency = random.choice(self.currencies)
+        amount = payloads.random_amount(*self.amount_range)
+        wallet = None
+        try:
+            wallet = helpers.fund_wallet(str(uuid.uuid4()), self.api_client, currency, amount)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            wallet = error  # raised by acquire(), the pool keeps refilling
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._ready.put(wallet)
@@ -1,11 +1,48 @@
-
 """
-This module provides configuration variables, for the time being they are not environment specific 
+This module provides configuration variables, for the time being they are not environment specific
 but can be further extended if needbe
 """
 
 import os
+import tempfile
 
-BASE_URL = "https://challenge.test.local/challenge/api/v1"
+BASE_URL = os.getenv("WALLET_API_BASE_URL", "https://challenge.test.local/challenge/api/v1")
 X_SERVICE_ID = os.getenv("X_SERVICE_ID")
 DEFAULT_API_TIMEOUT = 30
+
+# HTTP client settings (connection pooling and retry policy for idempotent requests)
+HTTP_POOL_SIZE = int(os.getenv("WALLET_API_POOL_SIZE", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("WALLET_API_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("WALLET_API_BACKOFF_FACTOR", "0.5"))
+# Attempts of the idempotent transaction submission (common.submission) before a POST that
+# keeps failing with connection errors or 5xx is given up
+SUBMIT_MAX_ATTEMPTS = int(os.getenv("WALLET_API_SUBMIT_MAX_ATTEMPTS", "4"))
+
+# Target API: "live" runs against BASE_URL, "local" starts the in-process stand-in server
+# (stand_in package) for the session and points BASE_URL at it
+API_TARGET = os.getenv("WALLET_API_TARGET", "live")
+# Server seconds per real second, at 600 the 30-minute pending timeout passes in 3 seconds
+STAND_IN_CLOCK_SPEED = float(os.getenv("WALLET_API_CLOCK_SPEED", "600"))
+# Server seconds a transaction stays 'pending' before the stand-in settles it
+STAND_IN_PROCESSING_DELAY = float(os.getenv("WALLET_API_PROCESSING_DELAY", "1"))
+# Real seconds a stand-in bearer token stays valid
+STAND_IN_TOKEN_TTL = float(os.getenv("WALLET_API_TOKEN_TTL", "3600"))
+
+# Pre-funded wallet pool used by the funded_wallet fixture
+WALLET_POOL_SIZE = int(os.getenv("WALLET_POOL_SIZE", "4"))
+WALLET_POOL_LOW_WATERMARK = int(os.getenv("WALLET_POOL_LOW_WATERMARK", "2"))
+WALLET_POOL_CURRENCIES = os.getenv("WALLET_POOL_CURRENCIES", "USD,EUR,GBP").split(",")
+WALLET_POOL_AMOUNT_RANGE = (float(os.getenv("WALLET_POOL_MIN_AMOUNT", "10")),
+                            float(os.getenv("WALLET_POOL_MAX_AMOUNT", "500")))
+
+# Auth token cache shared by all processes on this machine, tokens are refreshed this many
+# seconds before they expire; AUTH_TOKEN_TTL applies when the login response has no expiry
+AUTH_CACHE_FILE = os.getenv("WALLET_API_AUTH_CACHE",
+                            os.path.join(tempfile.gettempdir(), "wallet_api_auth_token.json"))
+AUTH_REFRESH_MARGIN = float(os.getenv("WALLET_API_AUTH_REFRESH_MARGIN", "60"))
+AUTH_TOKEN_TTL = float(os.getenv("WALLET_API_AUTH_TOKEN_TTL", "900"))
+
+# Performance regression suite (benchmarks.regression): where baselines keyed by commit are
+# stored and how many percent a benchmark's p95 may grow over its baseline before failing
+BENCHMARK_DIR = os.getenv("BENCHMARK_DIR", ".benchmarks")
+BENCHMARK_MAX_REGRESSION = float(os.getenv("BENCHMARK_MAX_REGRESSION", "25"))
@@ -1,4 +1,17 @@
 """This module groups fixtures for one-place-usage in tests"""
 
-from fixtures.auth_fixtures import _authenticate, auth_headers
-from fixtures.wallet_fixtures import funded_wallet, wallet_id
+from fixtures.auth_fixtures import _authenticate, auth_headers, auth_manager
+from fixtures.client_fixtures import api_client
+from fixtures.clock_fixtures import server_clock
+from fixtures.notification_fixtures import settlement_listener
+from fixtures.stand_in_fixtures import stand_in_server
+from fixtures.wallet_fixtures import funded_wallet, wallet_id, wallet_pool
+
+pytest_plugins = ["plugins.api_trace"]
+
+
+def pytest_collection_modifyitems(items):
+    """Run long polling tests first so they overlap with the rest of the suite instead of
+    becoming the critical path of a parallel (pytest-xdist) run. The sort is stable, so every
+    worker collects the same order."""
+    items.sort(key=lambda item: item.get_closest_marker("long_polling") is None)
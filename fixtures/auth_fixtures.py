@@ -1,30 +1,25 @@
 """This module provides fixtures for authentication"""
 
 import pytest
-import requests
-import config
+from common import auth
 
 @pytest.fixture(scope="session")
-def auth_headers():
-    """Fixture to authenticate once per test session and provide auth headers."""
-    token = _authenticate()
-    return {
-        "Authorization": f"Bearer {token}",
-        "X-Service-Id": config.X_SERVICE_ID,
-        "Content-Type": "application/json"
-    }
+def auth_manager(stand_in_server):  # pylint: disable=unused-argument
+    """Fixture providing the session's auth manager: the token is shared with other processes
+    through the disk cache and refreshed in the background ahead of expiry. It logs in on
+    first use of the token, not when the fixture is created.
+    Depends on stand_in_server so BASE_URL points at the stand-in before logging in."""
+    manager = auth.AuthManager().start_background_refresh()
+    yield manager
+    manager.stop()
+
+@pytest.fixture(scope="session")
+def auth_headers(auth_manager):
+    """Fixture to authenticate once per test session and provide auth headers. Logs in when
+    requested, prefer api_client, which defers the login to its first request."""
+    return auth_manager.headers()
 
 def _authenticate():
     """Fetch a valid authentication token by logging in"""
-    headers = {
-        "X-Service-Id": config.X_SERVICE_ID,
-        "Content-Type": "application/json"
-    }
-    response = requests.post(
-        f"{config.BASE_URL}/user/login",
-        json={"username": "<username>", "password": "<password>"},
-        headers=headers,
-        timeout=config.DEFAULT_API_TIMEOUT
-    )
-    assert response.status_code == 200, "Authentication failed"
-    return response.json().get("token")
+    token, _ = auth.login()
+    return token
@@ -0,0 +1,14 @@
+"""This module provides the shared Wallet API client fixture"""
+
+import pytest
+from common import auth
+from common.client import WalletApiClient
+
+@pytest.fixture(scope="session")
+def api_client(auth_manager):
+    """Fixture providing one pooled, authenticated Wallet API client per test session.
+    The token is taken from the auth manager on every request and re-fetched after a 401,
+    so nothing logs in until the first request is actually sent."""
+    client = WalletApiClient(headers=auth.service_headers(), auth=auth_manager)
+    yield client
+    client.close()
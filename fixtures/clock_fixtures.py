@@ -0,0 +1,13 @@
+"""This module provides fixtures for controlling the server clock"""
+
+import pytest
+from common.server_clock import ServerClock
+
+@pytest.fixture
+def server_clock(api_client):
+    """Fixture to advance or speed up the server clock in timeout scenarios. Against the
+    stand-in its changes take effect at once, against the live API they are no-ops and the test
+    waits in real time. A changed clock speed is restored after the test."""
+    clock = ServerClock(api_client)
+    yield clock
+    clock.reset_speed()
@@ -0,0 +1,12 @@
+"""This module provides fixtures for event-driven settlement notifications"""
+
+import pytest
+from common.notifications import SettlementListener
+
+@pytest.fixture(scope="session")
+def settlement_listener(api_client):
+    """Fixture subscribing once per session to the server's settlement events. When the server
+    has no push channel the listener is unavailable and waiters fall back to polling."""
+    listener = SettlementListener(api_client).start()
+    yield listener
+    listener.stop()
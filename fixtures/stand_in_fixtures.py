@@ -0,0 +1,20 @@
+"""This module provides fixtures for running the suite against the local stand-in server"""
+
+import pytest
+import config
+from stand_in import StandInServer
+
+@pytest.fixture(scope="session")
+def stand_in_server():
+    """Fixture to start the stand-in Wallet API when config.API_TARGET is 'local' and point
+    config.BASE_URL at it. Yields None when running against the live API. Started on demand by
+    the fixtures that talk to the API, so runs selecting only offline tests never start it."""
+    if config.API_TARGET != "local":
+        yield None
+        return
+    live_base_url = config.BASE_URL
+    server = StandInServer().start()
+    config.BASE_URL = server.base_url
+    yield server
+    server.stop()
+    config.BASE_URL = live_base_url
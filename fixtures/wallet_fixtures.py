@@ -1,56 +1,35 @@
 """This module provides fixtures for wallet related operations"""
 
-import random
 import uuid
 import pytest
-import requests
-from common import helpers
-import config
+from common.wallet_pool import FundedWalletPool
 
 @pytest.fixture
-def wallet_id():
-    """Fixture to create a wallet ID for testing."""
-    return str(uuid.uuid4())
+def wallet_id(request, stand_in_server):
+    """Fixture to create a wallet ID for testing. When running against the stand-in server,
+    a `stand_in` marker on the test configures the wallet (e.g. its bank balance)."""
+    new_wallet_id = str(uuid.uuid4())
+    marker = request.node.get_closest_marker("stand_in")
+    if stand_in_server is not None and marker is not None:
+        stand_in_server.state.configure_wallet(new_wallet_id, **marker.kwargs)
+    return new_wallet_id
 
 
-@pytest.fixture
-def funded_wallet(wallet_id, auth_headers):
-    """Fixture to add an initial amount to the wallet and return the currency 
-    and amount added."""
-    transaction_url = f"{config.BASE_URL}/wallet/{wallet_id}/transaction"
-    wallet_url = f"{config.BASE_URL}/wallet/{wallet_id}"
-
-    # Fund the wallet with a random amount in X currency
-    currency = random.choice(["USD", "EUR", "GBP"])
-    amount = round(random.uniform(10, 500), 2)
-    payload = {"currency": currency, "amount": amount, "type": "credit"}
-    response = requests.post(transaction_url, 
-                             json=payload, 
-                             headers=auth_headers,
-                             timeout=config.DEFAULT_API_TIMEOUT)
+@pytest.fixture(scope="session")
+def wallet_pool(api_client):
+    """Fixture providing a session-wide pool of wallets funded ahead of time in parallel."""
+    pool = FundedWalletPool(api_client).start()
+    yield pool
+    pool.close()
 
-    assert response.status_code == 200, (
-        f"Failed to fund wallet with {currency}, expected 200 but got {response.status_code}"
-    )
-    helpers.wait_for_transaction_succeeded(funded_wallet['wallet_id'], 
-                                           response.json()["transactionId"], 
-                                           auth_headers)
 
-    # Verify the wallet waas funded
-    wallet_response = requests.get(wallet_url, 
-                                   headers=auth_headers,
-                                   timeout=config.DEFAULT_API_TIMEOUT)
-    
-    assert wallet_response.status_code == 200, (
-        f"Failed to fetch wallet data, expected 200 but got {wallet_response.status_code}"
-    )
-    wallet_data = wallet_response.json()
-    assert len(wallet_data["currencyClips"]) == 1, "Wallet should have one currency clip"
-    assert wallet_data["currencyClips"][0]["currency"] == currency, (
-        f"Wallet currency is not {currency}"
-    )
-    assert wallet_data["currencyClips"][0]["amount"] == amount, (
-        "Wallet amount does not match the funded amount"
-    )
-
-    return {"wallet_id": wallet_id, "currency": currency, "amount": amount}
+@pytest.fixture
+def funded_wallet(request, wallet_pool, stand_in_server):
+    """Fixture to provide a wallet with an initial amount added and return the wallet id, 
+    currency and amount added. A `stand_in` marker configures the wallet once it is taken
+    from the pool, so the settings apply from then on, not to the funding."""
+    wallet = wallet_pool.acquire()
+    marker = request.node.get_closest_marker("stand_in")
+    if stand_in_server is not None and marker is not None:
+        stand_in_server.state.configure_wallet(wallet["wallet_id"], **marker.kwargs)
+    return wallet
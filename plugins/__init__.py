@@ -0,0 +1 @@
+"""pytest plugins of the Wallet API test suite"""
@@ -0,0 +1,130 @@
+"""
+This module provides a pytest plugin that traces every Wallet API request of a run to JSONL
+(one file per xdist worker) and summarises the trace per route and per test at the end.
+Trace files are only created once a request is sent, collect-only runs are not traced and only
+the most recent runs are kept.
+"""
+
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+from common.histogram import LatencyHistogram
+from common.instrumentation import POLL_ROUTE, TRACER, read_trace
+
+_RUN_ID = pytest.StashKey[str]()
+_TRACE_DIR = pytest.StashKey[Path]()
+
+
+def pytest_addoption(parser):
+    """Register the trace options."""
+    group = parser.getgroup("api-trace", "Wallet API request tracing")
+    group.addoption("--api-trace-dir", default=".api_trace",
+                    help="directory for the per-run JSONL request traces (default: .api_trace)")
+    group.addoption("--no-api-trace", action="store_true", help="disable request tracing")
+    group.addoption("--api-trace-top", type=int, default=10,
+                    help="number of routes and tests shown in the trace summary")
+    group.addoption("--api-trace-keep", type=int, default=20,
+                    help="number of runs whose traces are kept in the trace directory")
+
+
+def pytest_configure(config):
+    """Name this process's trace file, xdist workers reuse the controller's run id. The file is
+    created with the first traced request; the controller prunes the oldest runs."""
+    if config.getoption("no_api_trace") or config.getoption("collectonly"):
+        return
+    workerinput = getattr(config, "workerinput", {})
+    run_id = (workerinput.get("api_trace_run_id")
+              or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    trace_dir = Path(config.rootpath, config.getoption("api_trace_dir"))
+    if not workerinput:
+        prune_runs(trace_dir, config.getoption("api_trace_keep") - 1)
+    config.stash[_RUN_ID] = run_id
+    config.stash[_TRACE_DIR] = trace_dir
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    TRACER.open(trace_dir / f"{run_id}-{worker}.jsonl")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Hand the controller's run id to each xdist worker."""
+    if _RUN_ID in node.config.stash:
+        node.workerinput["api_trace_run_id"] = node.config.stash[_RUN_ID]
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item):
+    """Attribute every request the test's thread makes during setup, call and teardown to the
+    running test, requests of background threads are traced as <background>."""
+    TRACER.context = item.nodeid
+    yield
+    TRACER.context = None
+
+
+def pytest_unconfigure(config):  # pylint: disable=unused-argument
+    """Close the trace file."""
+    TRACER.close()
+
+
+def prune_runs(trace_dir, keep):
+    """Delete the trace files of all but the `keep` most recently written runs."""
+    runs = defaultdict(list)
+    for path in trace_dir.glob("*.jsonl"):
+        runs[path.stem.rsplit("-", 1)[0]].append(path)
+    by_age = sorted(runs.values(), key=lambda paths: max(path.stat().st_mtime for path in paths),
+                    reverse=True)
+    for paths in by_age[max(keep, 0):]:
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+
+def summarize(records):
+    """Aggregate trace records per route and per test."""
+    routes = defaultdict(lambda: {"count": 0, "errors": 0, "total": 0.0,
+                                  "histogram": LatencyHistogram()})
+    tests = defaultdict(lambda: {"requests": 0, "polls": 0, "total": 0.0})
+    for record in records:
+        route = routes[(record["method"], record["route"])]
+        route["count"] += 1
+        route["total"] += record["elapsed"]
+        route["histogram"].record(record["elapsed"])
+        if record["status"] is None or record["status"] >= 500:
+            route["errors"] += 1
+        test = tests[record["context"] or "<outside tests>"]
+        test["requests"] += 1
+        test["total"] += record["elapsed"]
+        if (record["method"], record["route"]) == POLL_ROUTE:
+            test["polls"] += 1
+    return routes, tests
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Print the slowest endpoints and the API time and poll requests spent per test."""
+    if _RUN_ID not in config.stash or hasattr(config, "workerinput"):
+        return
+    TRACER.flush()
+    paths = sorted(config.stash[_TRACE_DIR].glob(f"{config.stash[_RUN_ID]}-*.jsonl"))
+    routes, tests = summarize(read_trace(paths))
+    if not routes:
+        return
+    top = config.getoption("api_trace_top")
+    write = terminalreporter.write_line
+
+    terminalreporter.section("Wallet API trace")
+    write(f"trace: {', '.join(str(path) for path in paths)}")
+    write("")
+    write(f"{'route':<45} {'count':>7} {'errors':>6} {'total s':>8} {'p95 ms':>8} {'max ms':>8}")
+    by_p95 = sorted(routes.items(), key=lambda item: item[1]["histogram"].percentile(95),
+                    reverse=True)
+    for (method, route), stats in by_p95[:top]:
+        summary = stats["histogram"].summary()
+        write(f"{method + ' ' + route:<45} {stats['count']:>7} {stats['errors']:>6} "
+              f"{stats['total']:>8.2f} {summary['p95_ms']:>8.1f} {summary['max_ms']:>8.1f}")
+    write("")
+    write(f"{'test':<70} {'requests':>8} {'polls':>6} {'api s':>7}")
+    by_time = sorted(tests.items(), key=lambda item: item[1]["total"], reverse=True)
+    for nodeid, stats in by_time[:top]:
+        write(f"{nodeid[-70:]:<70} {stats['requests']:>8} {stats['polls']:>6} "
+              f"{stats['total']:>7.2f}")
@@ -0,0 +1,3 @@
+"""Local stand-in for the Wallet API, used for hermetic and load test runs"""
+
+from stand_in.server import StandInServer
@@ -0,0 +1,50 @@
+"""This module provides the stand-in server's clock, which can run faster than real time and be
+advanced or re-scaled while the server is running."""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class ScaledClock:
+    """Server clock in seconds that runs `speed` times faster than the real monotonic clock."""
+
+    def __init__(self, speed=1.0):
+        self._lock = threading.Lock()
+        self._speed = speed
+        self._real_base = time.monotonic()
+        self._server_base = 0.0
+        self._epoch = time.time()  # wall-clock time of server second 0
+
+    def now(self):
+        """Current server time in seconds since the clock was created."""
+        with self._lock:
+            return self._server_base + (time.monotonic() - self._real_base) * self._speed
+
+    def wall_time(self, seconds):
+        """The aware UTC datetime a server time corresponds to."""
+        return datetime.fromtimestamp(self._epoch + seconds, timezone.utc)
+
+    @property
+    def speed(self):
+        """How many server seconds pass per real second."""
+        return self._speed
+
+    def advance(self, seconds):
+        """Jump the clock `seconds` ahead."""
+        with self._lock:
+            self._server_base += seconds
+
+    def set_speed(self, speed):
+        """Run at `speed` from now on, the time that already passed is kept."""
+        if speed <= 0:
+            raise ValueError("clock speed must be positive")
+        with self._lock:
+            now = time.monotonic()
+            self._server_base += (now - self._real_base) * self._speed
+            self._real_base = now
+            self._speed = speed
+
+    def real_seconds(self, server_seconds):
+        """Real seconds it takes for `server_seconds` to pass on this clock."""
+        return server_seconds / self._speed
@@ -0,0 +1,282 @@
+"""
+This module provides a localhost HTTP stand-in for the Wallet API so the suite and load tests
+can run without network access.
+Its clock can be inspected and controlled under /stand-in/clock, so timeout scenarios need not
+wait in real time: POST {"advance": seconds} jumps it ahead, {"speed": n} makes it run n times
+faster than real time.
+
+Usage: python -m stand_in.server [--port 8080] [--clock-speed 600]
+"""
+
+import argparse
+import json
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import config
+from stand_in.clock import ScaledClock
+from stand_in.state import (ConflictError, DroppedResponse, NotFoundError, RateLimitedError,
+                            TransientError, ValidationError, WalletApiState, iso_format,
+                            parse_date)
+
+API_PREFIX = "/challenge/api/v1"
+EVENT_KEEPALIVE = 15  # seconds between keep-alive comments on idle event streams
+_INVALID_JSON = object()
+
+ROUTES = [
+    ("POST", re.compile(r"^/user/login$"), "login"),
+    ("GET", re.compile(r"^/transactions/events$"), "events"),
+    ("GET", re.compile(r"^/stand-in/clock$"), "get_clock"),
+    ("POST", re.compile(r"^/stand-in/clock$"), "control_clock"),
+    ("GET", re.compile(r"^/wallet/(?P<wallet_id>[^/]+)$"), "get_wallet"),
+    ("POST", re.compile(r"^/wallet/(?P<wallet_id>[^/]+)/transaction$"), "create_transaction"),
+    ("GET", re.compile(r"^/wallet/(?P<wallet_id>[^/]+)/transaction$"), "find_transaction"),
+    ("GET", re.compile(r"^/wallet/(?P<wallet_id>[^/]+)/transactions$"), "list_transactions"),
+    ("GET", re.compile(r"^/wallet/(?P<wallet_id>[^/]+)/transaction/(?P<transaction_id>[^/]+)$"),
+     "get_transaction"),
+]
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Routes Wallet API requests to the WalletApiState of the owning server."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients behave like against live
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self):
+        """The WalletApiState of the owning server."""
+        return self.server.state
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep test output clean."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Handle GET requests."""
+        self._dispatch("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handle POST requests."""
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        self._started = time.perf_counter()
+        body = self._read_body()
+        path = self.path.split("?", 1)[0]
+        if not path.startswith(API_PREFIX):
+            self._send(404, {"message": "not found"})
+            return
+        path = path[len(API_PREFIX):]
+        for route_method, pattern, handler_name in ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                if handler_name != "login" and not self._authorized():
+                    self._send(401, {"message": "missing or invalid bearer token"})
+                    return
+                try:
+                    result = getattr(self, handler_name)(body, **match.groupdict())
+                except ValidationError as error:
+                    result = 400, {"message": str(error)}
+                except NotFoundError as error:
+                    result = 404, {"message": str(error)}
+                except ConflictError as error:
+                    result = 422, {"message": str(error)}
+                except TransientError as error:
+                    result = 503, {"message": str(error)}
+                except RateLimitedError as error:
+                    result = 429, {"message": str(error)}, {"Retry-After": str(error.retry_after)}
+                except DroppedResponse as error:
+                    self.close_connection = True
+                    result = (200, "{", {"Connection": "close"}) if error.garbled else None
+                if result is not None:  # streaming handlers write their own response
+                    self._send(*result)
+                return
+        self._send(404, {"message": "not found"})
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return _INVALID_JSON
+
+    def _authorized(self):
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        return scheme == "Bearer" and self.state.is_valid_token(token)
+
+    def _send(self, status, payload, headers=None):
+        data = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Server-Timing",
+                         f"app;dur={(time.perf_counter() - self._started) * 1000:.3f}")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def login(self, body):
+        """POST /user/login"""
+        body = body if isinstance(body, dict) else {}
+        token = self.state.login(body.get("username"), body.get("password"))
+        if token is None:
+            return 401, {"message": "invalid credentials"}
+        expiry = datetime.now(timezone.utc) + timedelta(seconds=self.state.token_ttl)
+        return 200, {"token": token, "expiry": iso_format(expiry)}
+
+    def events(self, _body):
+        """GET /transactions/events, a server-sent event stream of every transaction that
+        reaches a terminal state, so clients can wait for settlement without polling."""
+        events = self.state.subscribe()
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=EVENT_KEEPALIVE)
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except OSError:
+            pass  # client went away
+        finally:
+            self.state.unsubscribe(events)
+
+    def get_wallet(self, _body, wallet_id):
+        """GET /wallet/{walletId}"""
+        return 200, self.state.get_wallet(wallet_id)
+
+    def create_transaction(self, body, wallet_id):
+        """POST /wallet/{walletId}/transaction"""
+        if body is _INVALID_JSON:
+            raise ValidationError("request body is not valid JSON")
+        return 200, self.state.create_transaction(wallet_id, body,
+                                                  self.headers.get("Idempotency-Key"))
+
+    def find_transaction(self, _body, wallet_id):
+        """GET /wallet/{walletId}/transaction?idempotencyKey=... , the transaction a POST with
+        that Idempotency-Key created"""
+        keys = parse_qs(urlsplit(self.path).query).get("idempotencyKey")
+        return 200, self.state.find_transaction(wallet_id, keys[0] if keys else None)
+
+    def get_clock(self, _body):
+        """GET /stand-in/clock, the server clock's time and speed (stand-in only)"""
+        return 200, self.state.clock_state()
+
+    def control_clock(self, body):
+        """POST /stand-in/clock with {"advance": seconds} and/or {"speed": n} (stand-in only)"""
+        if not isinstance(body, dict) or not {"advance", "speed"} & set(body):
+            raise ValidationError("expected an object with 'advance' and/or 'speed'")
+        if "speed" in body:
+            self.state.set_clock_speed(body["speed"])
+        if "advance" in body:
+            self.state.advance_clock(body["advance"])
+        return 200, self.state.clock_state()
+
+    def list_transactions(self, _body, wallet_id):
+        """GET /wallet/{walletId}/transactions?page=...&startDate=...&endDate=..."""
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            page = int(query.get("page", ["1"])[0])
+        except ValueError as error:
+            raise ValidationError("page must be a positive integer") from error
+        start_date, end_date = (parse_date(query[name][0], name) if name in query else None
+                                for name in ("startDate", "endDate"))
+        return 200, self.state.list_transactions(wallet_id, page, start_date, end_date)
+
+    def get_transaction(self, _body, wallet_id, transaction_id):
+        """GET /wallet/{walletId}/transaction/{transactionId}"""
+        return 200, self.state.get_transaction(wallet_id, transaction_id)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog deep enough for bursts of parallel clients."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class StandInServer:
+    """Runs the stand-in Wallet API on a background thread of the current process."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(self, host="127.0.0.1", port=0, clock_speed=config.STAND_IN_CLOCK_SPEED,
+                 processing_delay=config.STAND_IN_PROCESSING_DELAY,
+                 token_ttl=config.STAND_IN_TOKEN_TTL):
+        self.clock = ScaledClock(clock_speed)
+        self.state = WalletApiState(self.clock, processing_delay=processing_delay,
+                                    token_ttl=token_ttl)
+        self._httpd = _HTTPServer((host, port), _RequestHandler)
+        self._httpd.state = self.state
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Base URL to use in place of config.BASE_URL."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        """Start serving and settling on daemon threads."""
+        self.state.start_settler()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted."""
+        self.state.start_settler()
+        self._httpd.serve_forever()
+
+    def stop(self):
+        """Stop the background thread and release the socket."""
+        self._httpd.shutdown()
+        self.close()
+        self.state.stop_settler()
+
+    def close(self):
+        """Release the listening socket."""
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Run the stand-in in the foreground."""
+    parser = argparse.ArgumentParser(description="Local Wallet API stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--clock-speed", type=float, default=config.STAND_IN_CLOCK_SPEED)
+    parser.add_argument("--processing-delay", type=float,
+                        default=config.STAND_IN_PROCESSING_DELAY)
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port, args.clock_speed, args.processing_delay)
+    print(f"Wallet API stand-in listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
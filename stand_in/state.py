@@ -0,0 +1,423 @@
+"""
+This module provides the in-memory Wallet API model behind the stand-in server.
+Transactions start 'pending' and are settled against the server clock (lazily on every request
+and, when the settler runs, as soon as they are due) in submission order per wallet, so
+concurrent requests observe the same lifecycle as the live service.
+"""
+
+import heapq
+import math
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+
+SUPPORTED_CURRENCIES = ("USD", "EUR", "GBP")
+TRANSACTION_TYPES = ("credit", "debit")
+TRANSACTION_FIELDS = {"currency", "amount", "type"}
+PENDING_TIMEOUT = 30 * 60  # pending transactions are denied after 30 minutes
+TRANSACTIONS_PAGE_SIZE = 50
+
+
+class ValidationError(Exception):
+    """Raised for a transaction payload the API rejects with 400."""
+
+
+class NotFoundError(Exception):
+    """Raised for an unknown resource, mapped to 404."""
+
+
+class ConflictError(Exception):
+    """Raised when an idempotency key is reused for a different payload, mapped to 422."""
+
+
+class TransientError(Exception):
+    """Raised for an injected server error before anything was stored, mapped to 503."""
+
+
+class DroppedResponse(Exception):
+    """Raised after a transaction was stored when the connection must be dropped without an
+    answer, or with `garbled` a 200 whose body is not valid JSON, leaving the client unsure
+    whether it exists."""
+
+    def __init__(self, transaction, garbled=False):
+        super().__init__("response dropped")
+        self.transaction = transaction
+        self.garbled = garbled
+
+
+class RateLimitedError(Exception):
+    """Raised when a wallet exceeds its request rate, mapped to 429 with Retry-After."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"rate limit exceeded, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+def _parse_amount(value):
+    """Validate a JSON amount and return it as a Decimal with at most four decimal places."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValidationError("amount must be a number")
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation as error:
+        raise ValidationError("amount must be a number") from error
+    if not amount.is_finite() or amount <= 0:
+        raise ValidationError("amount must be positive")
+    if amount.as_tuple().exponent < -4:
+        raise ValidationError("amount must have at most four decimal places")
+    return amount
+
+
+def validate_transaction(payload):
+    """Return (currency, amount, type) for a valid payload or raise ValidationError."""
+    if not isinstance(payload, dict):
+        raise ValidationError("payload must be a JSON object")
+    if set(payload) != TRANSACTION_FIELDS:
+        raise ValidationError(f"payload must have exactly the fields {sorted(TRANSACTION_FIELDS)}")
+    if payload["currency"] not in SUPPORTED_CURRENCIES:
+        raise ValidationError(f"unsupported currency {payload['currency']!r}")
+    if payload["type"] not in TRANSACTION_TYPES:
+        raise ValidationError(f"unsupported transaction type {payload['type']!r}")
+    return payload["currency"], _parse_amount(payload["amount"]), payload["type"]
+
+
+def iso_format(moment):
+    """An aware datetime as an ISO-8601 UTC date-time with milliseconds, e.g.
+    2024-11-01T00:00:00.000Z."""
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def parse_date(value, name):
+    """Parse an ISO-8601 date-time query parameter, a value without an offset is UTC."""
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError as error:
+        raise ValidationError(f"{name} must be an ISO-8601 date-time") from error
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def _within(moment, start_date, end_date):
+    return (start_date is None or moment >= start_date) and (end_date is None or moment <= end_date)
+
+
+class WalletApiState:  # pylint: disable=too-many-instance-attributes
+    """Wallets, transactions and auth tokens of the stand-in server."""
+
+    def __init__(self, clock, processing_delay=1.0, bank_balance=None, token_ttl=3600):
+        self.clock = clock
+        self.processing_delay = processing_delay
+        self.default_bank_balance = bank_balance or {}
+        self.token_ttl = token_ttl
+        self._lock = threading.RLock()
+        self._tokens = {}  # token -> real monotonic expiry, tokens don't follow the fast clock
+        self._wallets = {}
+        self._transactions = {}
+        self._due = []  # heap of (due_time, sequence, transaction_id)
+        self._sequence = 0
+        self._wakeup = threading.Condition(self._lock)
+        self._settler = None
+        self._subscribers = []
+
+    def login(self, username, password):
+        """Issue a bearer token valid for `token_ttl` real seconds for any non-empty
+        credentials."""
+        if not username or not password:
+            return None
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._tokens[token] = time.monotonic() + self.token_ttl
+        return token
+
+    def is_valid_token(self, token):
+        """True if the token was issued by this server and has not expired."""
+        with self._lock:
+            return self._tokens.get(token, 0.0) > time.monotonic()
+
+    def revoke_tokens(self):
+        """Invalidate every issued token, as if they had all expired."""
+        with self._lock:
+            self._tokens.clear()
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def configure_wallet(self, wallet_id, bank_balance=None, hold_pending=False,
+                         rate_limit=None, faults=(), idempotency=True):
+        """Set per-wallet behaviour: the third-party bank balance per currency available to
+        credits (None for unlimited), whether the bank never answers, leaving transactions
+        pending until the 30-minute timeout denies them, the transactions per (real) second
+        the wallet accepts before answering 429 (None for unlimited) and the faults the next
+        POSTs run into, in order: 'error' answers 503 without storing the transaction, 'drop'
+        stores it and closes the connection without an answer, 'garble' stores it and answers 200
+        with a body that is not JSON and None passes a POST through.
+        With `idempotency` False the wallet ignores Idempotency-Key headers, like the live API."""
+        with self._lock:
+            wallet = self._wallet(wallet_id)
+            if bank_balance is not None:
+                wallet["bank_balance"] = {currency: Decimal(str(amount))
+                                          for currency, amount in bank_balance.items()}
+            wallet["hold_pending"] = hold_pending
+            wallet["rate_limit"] = rate_limit
+            wallet["faults"] = deque(faults)
+            wallet["idempotency"] = idempotency
+            # token bucket holding up to one second of requests
+            wallet["rate_tokens"], wallet["rate_updated"] = rate_limit, time.monotonic()
+
+    def _wallet(self, wallet_id):
+        if wallet_id not in self._wallets:
+            self._wallets[wallet_id] = {
+                "clips": {},
+                "bank_balance": {currency: Decimal(str(amount))
+                                 for currency, amount in self.default_bank_balance.items()},
+                "hold_pending": False,
+                "rate_limit": None,
+                "faults": deque(),
+                "idempotency": True,
+                "idempotency_keys": {},  # Idempotency-Key -> transaction id
+                "transactions": [],  # transaction ids in creation order
+                "last_due": 0.0,
+            }
+        return self._wallets[wallet_id]
+
+    def get_wallet(self, wallet_id):
+        """Return the wallet representation after settling everything that is due."""
+        with self._lock:
+            self.settle()
+            wallet = self._wallet(wallet_id)
+            return {
+                "walletId": wallet_id,
+                "currencyClips": [{"currency": currency, "amount": float(amount)}
+                                  for currency, amount in wallet["clips"].items()],
+            }
+
+    def create_transaction(self, wallet_id, payload, idempotency_key=None):
+        """Validate and enqueue a transaction, returning its 'pending' representation.
+        A repeated `idempotency_key` returns the transaction it created instead of a new one."""
+        with self._lock:
+            wallet = self._wallet(wallet_id)
+            self._throttle(wallet)
+            fault = wallet["faults"].popleft() if wallet["faults"] else None
+        if fault == "error":
+            raise TransientError("injected server error")
+        currency, amount, transaction_type = validate_transaction(payload)
+        with self._lock:
+            self.settle()
+            if not wallet["idempotency"]:
+                idempotency_key = None
+            existing_id = wallet["idempotency_keys"].get(idempotency_key)
+            if existing_id is not None:
+                existing = self._transactions[existing_id]
+                if (existing["currency"], existing["amount"], existing["type"]) != (
+                        currency, amount, transaction_type):
+                    raise ConflictError("idempotency key was used for a different transaction")
+                representation = self._represent(existing)
+            else:
+                representation = self._enqueue(wallet_id, wallet, currency, amount,
+                                               transaction_type, idempotency_key)
+        if fault in ("drop", "garble"):
+            raise DroppedResponse(representation, garbled=fault == "garble")
+        return representation
+
+    def find_transaction(self, wallet_id, idempotency_key):
+        """Return the transaction created with the idempotency key. A wallet that ignores keys
+        answers 404 like a server without the lookup route."""
+        with self._lock:
+            wallet = self._wallet(wallet_id)
+            if not wallet["idempotency"]:
+                raise NotFoundError("not found")
+            if not idempotency_key:
+                raise ValidationError("idempotencyKey query parameter is required")
+            self.settle()
+            transaction_id = wallet["idempotency_keys"].get(idempotency_key)
+            if transaction_id is None:
+                raise NotFoundError(f"no transaction with idempotency key {idempotency_key}")
+            return self._represent(self._transactions[transaction_id])
+
+    def list_transactions(self, wallet_id, page=1, start_date=None, end_date=None):
+        """Return one page of the wallet's transactions in creation order, limited to those
+        created within the optional aware datetimes `start_date` and `end_date`."""
+        if page < 1:
+            raise ValidationError("page must be a positive integer")
+        with self._lock:
+            self.settle()
+            transaction_ids = [
+                transaction_id for transaction_id in self._wallet(wallet_id)["transactions"]
+                if _within(self.clock.wall_time(self._transactions[transaction_id]["createdAt"]),
+                           start_date, end_date)]
+            start = (page - 1) * TRANSACTIONS_PAGE_SIZE
+            return {
+                "transactions": [self._represent(self._transactions[transaction_id])
+                                 for transaction_id in
+                                 transaction_ids[start:start + TRANSACTIONS_PAGE_SIZE]],
+                "totalCount": len(transaction_ids),
+                "currentPage": page,
+                "totalPages": max(math.ceil(len(transaction_ids) / TRANSACTIONS_PAGE_SIZE), 1),
+            }
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def _enqueue(self, wallet_id, wallet, currency, amount, transaction_type, idempotency_key):
+        """Store a new pending transaction, the caller holds the lock."""
+        now = self.clock.now()
+        if wallet["hold_pending"] or self.processing_delay >= PENDING_TIMEOUT:
+            due = now + PENDING_TIMEOUT
+        else:
+            # Settle in submission order per wallet, like a single processing queue
+            due = max(now + self.processing_delay, wallet["last_due"])
+            wallet["last_due"] = due
+        transaction_id = str(uuid.uuid4())
+        self._transactions[transaction_id] = {
+            "transactionId": transaction_id,
+            "walletId": wallet_id,
+            "currency": currency,
+            "amount": amount,
+            "type": transaction_type,
+            "status": "pending",
+            "outcome": None,
+            "createdAt": now,
+            "updatedAt": now,
+            "timedOut": due >= now + PENDING_TIMEOUT,
+        }
+        wallet["transactions"].append(transaction_id)
+        if idempotency_key is not None:
+            wallet["idempotency_keys"][idempotency_key] = transaction_id
+        self._sequence += 1
+        heapq.heappush(self._due, (due, self._sequence, transaction_id))
+        self._wakeup.notify()
+        return self._represent(self._transactions[transaction_id])
+
+    @staticmethod
+    def _throttle(wallet):
+        """Take one token from the wallet's rate limit bucket or raise RateLimitedError."""
+        rate = wallet["rate_limit"]
+        if rate is None:
+            return
+        now = time.monotonic()
+        tokens = min(rate, wallet["rate_tokens"] + (now - wallet["rate_updated"]) * rate)
+        wallet["rate_updated"] = now
+        if tokens < 1:
+            wallet["rate_tokens"] = tokens
+            # Retry-After is whole seconds (RFC 9110)
+            raise RateLimitedError(max(math.ceil((1 - tokens) / rate), 1))
+        wallet["rate_tokens"] = tokens - 1
+
+    def get_transaction(self, wallet_id, transaction_id):
+        """Return the transaction representation after settling everything that is due."""
+        with self._lock:
+            self.settle()
+            transaction = self._transactions.get(transaction_id)
+            if transaction is None or transaction["walletId"] != wallet_id:
+                raise NotFoundError(f"transaction {transaction_id} not found")
+            return self._represent(transaction)
+
+    def settle(self):
+        """Finish every pending transaction whose due time has passed on the server clock."""
+        with self._lock:
+            now = self.clock.now()
+            while self._due and self._due[0][0] <= now:
+                due, _, transaction_id = heapq.heappop(self._due)
+                self._finish(self._transactions[transaction_id], due)
+
+    def clock_state(self):
+        """The server clock's current time and speed."""
+        return {"now": self.clock.now(), "speed": self.clock.speed}
+
+    def advance_clock(self, seconds):
+        """Jump the server clock ahead and settle everything that became due."""
+        if not isinstance(seconds, (int, float)) or isinstance(seconds, bool) or seconds < 0:
+            raise ValidationError("advance must be a non-negative number of seconds")
+        with self._lock:
+            self.clock.advance(seconds)
+            self.settle()
+            self._wakeup.notify()
+        return self.clock_state()
+
+    def set_clock_speed(self, speed):
+        """Run the server clock `speed` times faster than real time from now on."""
+        if not isinstance(speed, (int, float)) or isinstance(speed, bool) or speed <= 0:
+            raise ValidationError("speed must be a positive number")
+        with self._lock:
+            self.clock.set_speed(speed)
+            self._wakeup.notify()  # the settler's next wake-up time changed
+        return self.clock_state()
+
+    def start_settler(self):
+        """Settle transactions on a background thread as soon as they are due, so subscribers
+        get their events without anyone polling."""
+        with self._lock:
+            if self._settler is None:
+                self._settler = threading.Thread(target=self._settle_loop, daemon=True,
+                                                 name="stand-in-settler")
+                self._settler.start()
+
+    def stop_settler(self):
+        """Stop the background settler."""
+        with self._lock:
+            settler, self._settler = self._settler, None
+            self._wakeup.notify()
+        if settler is not None:
+            settler.join()
+
+    def _settle_loop(self):
+        with self._lock:
+            while self._settler is threading.current_thread():
+                self.settle()
+                delay = None
+                if self._due:
+                    delay = max(self.clock.real_seconds(self._due[0][0] - self.clock.now()), 0)
+                self._wakeup.wait(delay)
+
+    def subscribe(self):
+        """Return a queue that receives every transaction reaching a terminal state."""
+        events = queue.SimpleQueue()
+        with self._lock:
+            self._subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events):
+        """Stop delivering events to a queue returned by subscribe()."""
+        with self._lock:
+            if events in self._subscribers:
+                self._subscribers.remove(events)
+
+    def _finish(self, transaction, finished_at):
+        approved = not transaction["timedOut"] and self._apply(transaction)
+        transaction["status"] = "finished"
+        transaction["outcome"] = "approved" if approved else "denied"
+        transaction["updatedAt"] = finished_at
+        if self._subscribers:
+            event = self._represent(transaction)
+            for events in self._subscribers:
+                events.put(event)
+
+    def _apply(self, transaction):
+        """Move the funds of a transaction, returning False if they are not available."""
+        wallet = self._wallet(transaction["walletId"])
+        currency, amount = transaction["currency"], transaction["amount"]
+        clips = wallet["clips"]
+        if transaction["type"] == "debit":
+            if clips.get(currency, Decimal("0")) < amount:
+                return False
+            clips[currency] -= amount
+            return True
+        bank = wallet["bank_balance"]
+        if currency in bank:
+            if bank[currency] < amount:
+                return False
+            bank[currency] -= amount
+        clips[currency] = clips.get(currency, Decimal("0")) + amount
+        return True
+
+    def _represent(self, transaction):
+        return {
+            "transactionId": transaction["transactionId"],
+            "walletId": transaction["walletId"],
+            "currency": transaction["currency"],
+            "amount": float(transaction["amount"]),
+            "type": transaction["type"],
+            "status": transaction["status"],
+            "outcome": transaction["outcome"],
+            "createdAt": iso_format(self.clock.wall_time(transaction["createdAt"])),
+            "updatedAt": iso_format(self.clock.wall_time(transaction["updatedAt"])),
+        }
@@ -0,0 +1,73 @@
+"""This module provides tests for token caching and transparent re-login."""
+
+import json
+import time
+import pytest
+import config
+from common import auth
+from common.auth import AuthManager
+from common.client import WalletApiClient
+
+# These tests control the server's tokens, which is only possible on the local stand-in
+pytestmark = pytest.mark.skipif(config.API_TARGET != "local",
+                                reason="requires the local stand-in (WALLET_API_TARGET=local)")
+
+def test_request_retried_after_token_expiry(stand_in_server, wallet_id, api_client):
+    """Test that a request made with an expired token succeeds after a transparent re-login."""
+    stale_token = api_client.auth.token
+    stand_in_server.state.revoke_tokens()
+
+    response = api_client.get_wallet(wallet_id)
+
+    assert response.status_code == 200, (
+        f"Request was not retried after re-login, got {response.status_code}"
+    )
+    assert api_client.auth.token != stale_token, "Token was not refreshed after a 401"
+
+@pytest.mark.usefixtures("stand_in_server")
+def test_token_shared_through_disk_cache(tmp_path):
+    """Test that managers sharing a cache file (e.g. xdist workers) log in only once."""
+    cache_file = tmp_path / "auth_token.json"
+    first = AuthManager(cache_file=str(cache_file))
+    second = AuthManager(cache_file=str(cache_file))
+
+    assert first.token == second.token, "Second manager logged in instead of using the cache"
+
+    second.refresh(stale_token=first.token)
+    assert first.refresh(stale_token=first.token) == second.token, (
+        "First manager did not adopt the token refreshed by the second one"
+    )
+
+@pytest.mark.usefixtures("stand_in_server")
+def test_login_deferred_until_first_request(tmp_path, wallet_id):
+    """Test that creating the client does not log in, its first request does."""
+    cache_file = tmp_path / "auth_token.json"
+    manager = AuthManager(cache_file=str(cache_file))
+    with WalletApiClient(headers=auth.service_headers(), auth=manager) as client:
+        assert not cache_file.exists(), "Logged in before any request was sent"
+
+        response = client.get_wallet(wallet_id)
+        assert response.status_code == 200
+        assert cache_file.exists(), "The first request did not log in"
+
+def test_token_expiry_read_from_login_response(stand_in_server):
+    """Test that the token's expiry comes from the login response's ISO-8601 `expiry`
+    rather than the AUTH_TOKEN_TTL fallback."""
+    token, expires_at = auth.login()
+
+    assert token
+    assert abs(expires_at - (time.time() + stand_in_server.state.token_ttl)) < 5, (
+        "The expiry of the login response was not used"
+    )
+
+@pytest.mark.usefixtures("stand_in_server")
+def test_malformed_cache_entries_are_dropped(tmp_path):
+    """Test that cache entries without an expiry (e.g. written by an older version) do not
+    break logging in, they are dropped when the cache is rewritten."""
+    cache_file = tmp_path / "auth_token.json"
+    cache_file.write_text(json.dumps({"https://other.example": {"token": "stale"}}),
+                          encoding="utf-8")
+    manager = AuthManager(cache_file=str(cache_file))
+
+    assert manager.token
+    assert list(json.loads(cache_file.read_text(encoding="utf-8"))) == [manager.base_url]
@@ -0,0 +1,54 @@
+"""This module provides tests for benchmark baselines and regression checks."""
+
+from datetime import datetime, timezone
+from common import baselines
+from common.baselines import BaselineStore, compare
+
+def _summary(p95_ms):
+    return {"count": 20, "p50_ms": p95_ms / 2, "p95_ms": p95_ms, "p99_ms": p95_ms,
+            "max_ms": p95_ms}
+
+def test_baseline_store_round_trip(tmp_path):
+    """Test that baselines are stored per commit and target and the latest one is found."""
+    store = BaselineStore(str(tmp_path))
+    store.save("aaa", "local", {"login": _summary(4)})
+    store.save("bbb", "local", {"login": _summary(5)})
+    store.save("ccc", "live", {"login": _summary(50)})
+
+    assert store.load("aaa", "local")["benchmarks"]["login"]["p95_ms"] == 4
+    assert store.load("aaa", "live") is None
+    assert store.latest("local")["commit"] == "bbb"
+    assert store.latest("local", exclude="bbb")["commit"] == "aaa"
+
+def test_compare_flags_p95_regressions():
+    """Test that only p95 growth beyond both the percentage and the absolute delta fails."""
+    baseline = {"benchmarks": {"login": _summary(4), "settle_100_batch": _summary(200),
+                               "credit_round_trip": _summary(0.5)}}
+    current = {"login": _summary(4.4), "settle_100_batch": _summary(300),
+               "credit_round_trip": _summary(0.9), "bulk_wallet_reads": _summary(100)}
+
+    comparison = {entry["benchmark"]: entry for entry in compare(current, baseline, 25, 1.0)}
+
+    assert set(comparison) == {"login", "settle_100_batch", "credit_round_trip"}
+    assert comparison["settle_100_batch"]["regressed"]
+    assert comparison["settle_100_batch"]["change_pct"] == 50.0
+    assert not comparison["login"]["regressed"], "10% growth is within the threshold"
+    assert not comparison["credit_round_trip"]["regressed"], "0.4 ms growth is noise"
+
+def test_latest_baseline_when_created_times_tie(tmp_path, monkeypatch):
+    """Test that the baseline saved last is the latest even when both were created within
+    the same clock tick."""
+    class FrozenDatetime(datetime):
+        """A datetime whose clock stands still."""
+
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2024, 11, 1, tzinfo=tz or timezone.utc)
+
+    monkeypatch.setattr(baselines, "datetime", FrozenDatetime)
+    store = BaselineStore(str(tmp_path))
+    for commit in ("bbb", "aaa", "ccc", "abc"):
+        store.save(commit, "local", {"login": _summary(4)})
+
+    assert store.latest("local")["commit"] == "abc"
+    assert store.latest("local", exclude="abc")["commit"] == "ccc"
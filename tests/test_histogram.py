@@ -0,0 +1,30 @@
+"""This module provides tests for the load-test latency histogram."""
+
+from common.histogram import LatencyHistogram
+
+def test_histogram_percentiles_within_relative_error():
+    """Test that percentiles of a uniform 1..1000 ms distribution are accurate to ~1%."""
+    histogram = LatencyHistogram()
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+
+    for percent in (50, 95, 99):
+        expected = percent / 100
+        actual = histogram.percentile(percent)
+        assert abs(actual - expected) <= expected * 0.02, (
+            f"p{percent} was {actual}, expected about {expected}"
+        )
+    assert histogram.summary()["max_ms"] == 1000
+
+def test_histogram_merge():
+    """Test that merging histograms adds their samples."""
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(0.010)
+    second.record(0.020)
+    second.record(0.030)
+
+    first.merge(second)
+
+    assert first.count == 3
+    assert first.max == 0.030
+    assert first.percentile(0) is not None
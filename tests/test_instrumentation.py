@@ -0,0 +1,25 @@
+"""This module provides tests for the request tracer."""
+
+import threading
+from common.instrumentation import BACKGROUND, RequestTracer, read_trace
+
+def test_background_requests_are_not_attributed_to_the_test(tmp_path):
+    """Test that requests of other threads are tagged as background while work handed to a
+    pool through `bind` keeps the caller's context."""
+    tracer = RequestTracer()
+    tracer.open(tmp_path / "trace.jsonl")
+    tracer.context = "tests/test_example.py::test_example"
+
+    def send(method):
+        tracer.record(method, "/wallet/1", 200, 0, 0, 0.01)
+
+    send("GET")
+    for target in (send, tracer.bind(send)):
+        thread = threading.Thread(target=target, args=("POST",))
+        thread.start()
+        thread.join()
+    tracer.close()
+
+    contexts = [record["context"] for record in read_trace([tmp_path / "trace.jsonl"])]
+    assert contexts == ["tests/test_example.py::test_example", BACKGROUND,
+                        "tests/test_example.py::test_example"]
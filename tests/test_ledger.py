@@ -0,0 +1,78 @@
+"""This module provides tests for the client-side balance ledger."""
+
+import threading
+import time
+from decimal import Decimal
+import pytest
+from common.ledger import Ledger
+
+def test_ledger_tracks_currencies_exactly():
+    """Test that approved outcomes are summed exactly per currency and others are ignored."""
+    ledger = Ledger()
+    transactions = [
+        ({"currency": "USD", "amount": 0.1, "type": "credit"}, "approved"),
+        ({"currency": "USD", "amount": 0.2, "type": "credit"}, "approved"),
+        ({"currency": "EUR", "amount": 5, "type": "credit"}, "approved"),
+        ({"currency": "EUR", "amount": 7.5, "type": "debit"}, "denied"),
+        ({"currency": "USD", "amount": 0.05, "type": "debit"}, "approved"),
+    ]
+    for payload, outcome in transactions:
+        ledger.submit("wallet", payload)
+    assert ledger.in_flight("wallet")
+    for payload, outcome in transactions:
+        ledger.settle("wallet", payload, outcome)
+
+    assert not ledger.in_flight("wallet")
+    assert ledger.expected_clips("wallet") == {"USD": Decimal("0.25"), "EUR": Decimal("5")}
+
+def test_ledger_checkpoint(funded_wallet, api_client):
+    """Test that a checkpoint accepts balances within the in-flight range and rejects a
+    wallet that does not match the recorded outcomes."""
+    wallet_id = funded_wallet["wallet_id"]
+    ledger = Ledger()
+    funding = {"currency": funded_wallet["currency"], "amount": funded_wallet["amount"],
+               "type": "credit"}
+    ledger.submit(wallet_id, funding)
+    ledger.settle(wallet_id, funding, "approved")
+    ledger.checkpoint(api_client, wallet_id)
+
+    # A debit that was never sent is in flight, the wallet may or may not reflect it yet
+    debit = {**funding, "amount": 1, "type": "debit"}
+    ledger.submit(wallet_id, debit)
+    ledger.checkpoint(api_client, wallet_id)
+
+    # Once recorded as approved the wallet no longer matches
+    ledger.settle(wallet_id, debit, "approved")
+    with pytest.raises(AssertionError, match="does not match the ledger"):
+        ledger.checkpoint(api_client, wallet_id)
+
+def test_checkpoint_does_not_block_recording():
+    """Test that transactions can be recorded while a checkpoint waits for the server, the
+    ledger is not locked across the request."""
+    ledger = Ledger()
+    requested, release = threading.Event(), threading.Event()
+
+    class SlowClient:
+        """Client and response in one, answering with an empty wallet once released."""
+        status_code = 200
+
+        def get_wallet(self, _wallet_id):
+            """Block until the test releases the request."""
+            requested.set()
+            release.wait(5)
+            return self
+
+        def json(self):
+            """The empty wallet."""
+            return {"currencyClips": []}
+
+    checkpoint = threading.Thread(target=ledger.checkpoint, args=(SlowClient(), "wallet"))
+    checkpoint.start()
+    assert requested.wait(5)
+    started = time.monotonic()
+    ledger.submit("wallet", {"currency": "USD", "amount": 1, "type": "credit"})
+    blocked = time.monotonic() - started
+    release.set()
+    checkpoint.join()
+
+    assert blocked < 1, f"submit() waited {blocked:.1f}s for the checkpoint's request"
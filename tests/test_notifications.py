@@ -0,0 +1,47 @@
+"""This module provides tests for event-driven settlement notifications."""
+
+import threading
+import time
+import pytest
+import config
+from common import payloads
+from common.notifications import SettlementListener
+
+# The live API offers no event stream, the listener would never become available
+pytestmark = pytest.mark.skipif(config.API_TARGET != "local",
+                                reason="requires the local stand-in (WALLET_API_TARGET=local)")
+
+def test_waiters_are_woken_when_the_stream_ends(api_client):
+    """Test that waiting on events returns as soon as the stream ends instead of blocking
+    for the whole timeout, and that a listener without a stream fails new futures at once."""
+    listener = SettlementListener(api_client).start()
+    assert listener.available, "The stand-in offers an event stream"
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(
+        listener.wait(["never-settled"], timeout=30)))
+    started = time.monotonic()
+    waiter.start()
+    time.sleep(0.2)
+    listener.stop()
+    waiter.join(timeout=5)
+
+    assert not waiter.is_alive(), "The waiter was not woken when the stream ended"
+    assert results == [{}]
+    assert time.monotonic() - started < 5
+    assert listener.future("never-settled").exception() is not None
+
+def test_events_arrive_without_waiting_for_a_full_chunk(wallet_id, api_client):
+    """Test that a single settlement event reaches its waiter long before the timeout, the
+    stream is read line by line rather than in buffered chunks."""
+    listener = SettlementListener(api_client).start()
+    try:
+        response = api_client.post_transaction(wallet_id, payloads.random_credit())
+        assert response.status_code == 200, "Failed to perform transaction"
+        transaction_id = response.json()["transactionId"]
+        started = time.monotonic()
+        settled = listener.wait([transaction_id], timeout=10)
+    finally:
+        listener.stop()
+
+    assert transaction_id in settled, "The settlement event never arrived"
+    assert time.monotonic() - started < 5
@@ -0,0 +1,59 @@
+"""This module provides tests for the negative payload matrix."""
+
+import json
+import pytest
+import config
+from common import payload_matrix, payloads
+
+TRANSACTION_FIELDS = {"currency", "amount", "type"}
+
+def _breaks_documented_rule(payload):
+    """True when the payload breaks the TransactionRequest schema of misc/WalletApiSpec or
+    one of the assumptions listed in the README, independently of any server's validator."""
+    if not isinstance(payload, dict):
+        return True  # schema: an object
+    if set(payload) != TRANSACTION_FIELDS:
+        return True  # assumed: exactly the three schema properties are required
+    currency, amount, transaction_type = (payload[field] for field in ("currency", "amount",
+                                                                       "type"))
+    if transaction_type not in ("credit", "debit"):
+        return True  # schema: type enum
+    if not isinstance(currency, str) or currency not in payloads.CURRENCIES:
+        return True  # schema: string; assumed: only supported currency codes
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+        return True  # schema: number
+    return amount <= 0  # assumed: amounts are positive
+
+def test_matrix_cases_are_distinct_and_invalid():
+    """Test that the matrix holds thousands of distinct cases, each one expected to be
+    rejected breaking a documented constraint of the transaction payload."""
+    cases = payload_matrix.build_cases(currency="EUR")
+
+    assert len(cases) > 1000
+    assert len({json.dumps(case["payload"], sort_keys=True) for case in cases}) == len(cases)
+    valid = [case["case"] for case in cases
+             if case["expected"] is not None and not _breaks_documented_rule(case["payload"])]
+    assert not valid, f"Cases without a documented violation: {valid[:10]}"
+    unspecified = [case["payload"] for case in cases if case["expected"] is None]
+    assert unspecified and not any(map(_breaks_documented_rule, unspecified))
+
+def test_unexpected_rows_are_reported():
+    """Test that only rows answered differently than expected are reported."""
+    table = [{"case": "amount zero", "payload": {}, "expected": 400, "status": 400},
+             {"case": "currency lowercase", "payload": {}, "expected": 400, "status": 200},
+             {"case": "amount half cent", "payload": {}, "expected": None, "status": 200}]
+
+    failed = payload_matrix.unexpected(table)
+    assert [row["case"] for row in failed] == ["currency lowercase"]
+    assert "currency lowercase" in payload_matrix.format_table(failed)
+
+@pytest.mark.skipif(config.API_TARGET != "local",
+                    reason="requires the local stand-in (WALLET_API_TARGET=local)")
+@pytest.mark.stand_in(rate_limit=20)
+def test_throttled_cases_are_retried(wallet_id, api_client):
+    """Test that a rate limit does not leak 429s into the result table."""
+    cases = payload_matrix.build_cases()[:60]
+    table = payload_matrix.run_cases(api_client, wallet_id, cases, max_workers=8)
+
+    assert not payload_matrix.unexpected(table), payload_matrix.format_table(
+        payload_matrix.unexpected(table))
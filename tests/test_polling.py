@@ -0,0 +1,11 @@
+"""This module provides tests for the polling strategies."""
+
+from common.polling import ExponentialBackoff
+
+def test_backoff_stays_at_cap_for_long_waits():
+    """Test that the backoff keeps returning the cap after thousands of attempts instead of
+    overflowing the exponent."""
+    strategy = ExponentialBackoff(initial=0.001, cap=5.0, jitter=0)
+
+    assert strategy.delay(5) == 0.001
+    assert strategy.delay(10_000) == 5.0
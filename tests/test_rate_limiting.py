@@ -0,0 +1,41 @@
+"""This module provides tests for rate limiting and the paced request scheduler."""
+
+import pytest
+import config
+from common import payloads
+from common.scheduler import PacedRun, run_paced
+
+# The stand-in lets a test set a wallet's rate limit, the live limits are unknown
+pytestmark = pytest.mark.skipif(config.API_TARGET != "local",
+                                reason="requires the local stand-in (WALLET_API_TARGET=local)")
+
+@pytest.mark.stand_in(rate_limit=5)
+def test_rate_limit_enforced(wallet_id, api_client):
+    """Test that requests above the rate limit are rejected with 429 and a Retry-After."""
+    responses = [api_client.post_transaction(wallet_id, payloads.random_credit())
+                 for _ in range(10)]
+
+    throttled = [response for response in responses if response.status_code == 429]
+    assert throttled, "No request was throttled"
+    assert all(response.status_code in (200, 429) for response in responses)
+    for response in throttled:
+        assert int(response.headers["Retry-After"]) >= 1, "429 without a usable Retry-After"
+
+@pytest.mark.stand_in(rate_limit=10)
+def test_paced_run_adapts_to_throttling(wallet_id, api_client):
+    """Test that the scheduler honours 429s without failures and reports the shortfall."""
+    report = run_paced(api_client, [wallet_id], target_rate=30, duration=3)
+
+    assert report["throttled"] > 0, "The target rate never reached the rate limit"
+    assert not report["errors"], f"Unexpected errors {report['errors']}"
+    assert report["missing_retry_after"] == 0
+    assert report["gave_up"] == 0, "Throttled requests were dropped instead of retried"
+    assert report["achieved_rate"] <= 10 * 1.5, "Achieved rate exceeds the rate limit"
+    assert report["shortfall"] > 0.3
+    assert report["final_allowed_rate"] < 30, "Allowed rate did not back off after 429s"
+
+def test_paced_run_needs_a_wallet():
+    """Test that a paced run without wallets is rejected up front instead of failing once
+    it looks for the next request."""
+    with pytest.raises(ValueError, match="at least one wallet"):
+        PacedRun(None, [], target_rate=10)
@@ -0,0 +1,34 @@
+"""This module provides tests for the controllable server clock."""
+
+import pytest
+import config
+from stand_in.clock import ScaledClock
+
+def test_scaled_clock_advance_and_speed():
+    """Test that advancing and re-scaling the clock keep the time that already passed."""
+    clock = ScaledClock(speed=1.0)
+    clock.advance(1800)
+    assert 1800 <= clock.now() < 1801
+
+    clock.set_speed(1000.0)
+    before = clock.now()
+    assert before >= 1800, "Changing the speed moved the clock back"
+    assert clock.real_seconds(1000) == pytest.approx(1.0)
+
+    with pytest.raises(ValueError):
+        clock.set_speed(0)
+
+@pytest.mark.skipif(config.API_TARGET != "local",
+                    reason="requires the local stand-in (WALLET_API_TARGET=local)")
+def test_server_clock_advances_stand_in(server_clock, api_client):
+    """Test that the fixture controls the stand-in clock and restores its speed."""
+    before = api_client.get("/stand-in/clock").json()
+
+    assert server_clock.advance(60), "The stand-in clock is not controllable"
+    assert server_clock.set_speed(before["speed"] * 2)
+    after = api_client.get("/stand-in/clock").json()
+    assert after["now"] >= before["now"] + 60
+    assert after["speed"] == before["speed"] * 2
+
+    server_clock.reset_speed()
+    assert api_client.get("/stand-in/clock").json()["speed"] == before["speed"]
@@ -0,0 +1,50 @@
+"""This module provides tests for batched wallet snapshots."""
+
+from decimal import Decimal
+from common.ledger import Ledger
+from common.snapshots import WalletSnapshot, take_snapshot
+
+def test_snapshot_diff():
+    """Test that a diff lists changed, added and emptied clips of wallets in both snapshots."""
+    previous = WalletSnapshot(["a", "b", "c"], ["a", "a", "b", "c"], ["USD", "EUR", "USD", "GBP"],
+                              [Decimal("10"), Decimal("5"), Decimal("1"), Decimal("7")], 0.0)
+    current = WalletSnapshot(["a", "b"], ["a", "a", "b", "b"], ["USD", "EUR", "USD", "GBP"],
+                             [Decimal("12.5"), Decimal("5"), Decimal("0"), Decimal("3")], 1.0,
+                             errors={"c": 503})
+
+    diff = current.diff(previous)
+
+    assert diff == {
+        "wallet_id": ["a", "b", "b"],
+        "currency": ["USD", "GBP", "USD"],
+        "before": [Decimal("10"), Decimal("0"), Decimal("1")],
+        "after": [Decimal("12.5"), Decimal("3"), Decimal("0")],
+        "delta": [Decimal("2.5"), Decimal("3"), Decimal("-1")],
+    }
+
+def test_check_wallets_against_ledger(wallet_pool, wallet_id, api_client):
+    """Test that one snapshot checks several funded wallets and an empty one, and flags the
+    wallet whose balance does not match the ledger."""
+    wallets = [wallet_pool.acquire() for _ in range(3)]
+    ledger = Ledger()
+    for wallet in wallets:
+        funding = {"currency": wallet["currency"], "amount": wallet["amount"], "type": "credit"}
+        ledger.submit(wallet["wallet_id"], funding)
+        ledger.settle(wallet["wallet_id"], funding, "approved")
+    wallet_ids = [wallet["wallet_id"] for wallet in wallets] + [wallet_id]
+
+    snapshot, mismatches = ledger.check_wallets(api_client, wallet_ids)
+    assert mismatches == {}, f"Unexpected balance mismatches {mismatches}"
+    assert snapshot.wallets == wallet_ids
+    assert len(snapshot) == 3, "Expected one currency clip per funded wallet"
+
+    # Record a credit the server never saw for the first wallet
+    phantom = {"currency": wallets[0]["currency"], "amount": 1, "type": "credit"}
+    ledger.submit(wallets[0]["wallet_id"], phantom)
+    ledger.settle(wallets[0]["wallet_id"], phantom, "approved")
+    _, mismatches = ledger.check_wallets(api_client, wallet_ids)
+    assert list(mismatches) == [wallets[0]["wallet_id"]]
+
+    assert take_snapshot(api_client, wallet_ids).diff(snapshot) == {
+        "wallet_id": [], "currency": [], "before": [], "after": [], "delta": []
+    }, "Wallets changed between snapshots without any transaction"
@@ -0,0 +1,39 @@
+"""This module provides tests for the streaming soak run."""
+
+import json
+import pytest
+import config
+from common import payloads
+from common.soak import SoakRun
+
+def test_soak_run_keeps_window_bounded(wallet_id, api_client, settlement_listener, tmp_path):
+    """Test a short soak run never exceeds its in-flight window and streams every result
+    to the results file."""
+    results_file = tmp_path / "soak.jsonl"
+    run = SoakRun(api_client, wallet_id, results_file, window=8, workers=8,
+                  listener=settlement_listener)
+
+    summary = run.run(payloads.transaction_stream("USD", debit_ratio=0.2), limit=100)
+
+    assert summary["max_in_flight"] <= 8, (
+        f"In-flight window exceeded, {summary['max_in_flight']} transactions were pending"
+    )
+    assert summary["counts"]["submitted"] == 100
+    assert summary["counts"].get("mismatched", 0) == 0, "Settled transactions do not match"
+    assert summary["balance_verified"], "Wallet balance does not match approved transactions"
+    with open(results_file, encoding="utf-8") as file:
+        results = [json.loads(line) for line in file]
+    assert len(results) == 100, f"Expected 100 result lines, got {len(results)}"
+    assert {result["result"] for result in results} <= {"approved", "denied"}
+
+@pytest.mark.skipif(config.API_TARGET != "local",
+                    reason="requires the local stand-in (WALLET_API_TARGET=local)")
+@pytest.mark.stand_in(faults=["garble"] * 12)
+def test_soak_run_releases_window_on_unexpected_errors(wallet_id, api_client, tmp_path):
+    """Test that unreadable responses are recorded as errors and never exhaust the window."""
+    run = SoakRun(api_client, wallet_id, tmp_path / "soak.jsonl", window=4, workers=4)
+
+    summary = run.run(payloads.transaction_stream("USD"), limit=12)
+
+    assert summary["counts"]["submitted"] == 12
+    assert summary["counts"]["error"] == 12, f"Unexpected counts {summary['counts']}"
@@ -0,0 +1,126 @@
+"""This module provides tests for idempotent transaction submission."""
+
+from collections import Counter
+from datetime import datetime, timedelta
+import pytest
+import config
+from common import auth, helpers, payloads, submission
+from common.client import WalletApiClient
+from common.ledger import Ledger
+
+# The stand-in lets a test inject dropped responses and server errors, the live API cannot
+pytestmark = pytest.mark.skipif(config.API_TARGET != "local",
+                                reason="requires the local stand-in (WALLET_API_TARGET=local)")
+
+@pytest.mark.stand_in(faults=["drop"])
+def test_dropped_response_is_reconciled(wallet_id, api_client):
+    """Test that a transaction whose response was lost is found by its key, not sent twice."""
+    ledger = Ledger()
+    payload = payloads.random_credit()
+    stats = Counter()
+    ledger.submit(wallet_id, payload)
+    response = submission.submit_transaction(api_client, wallet_id, payload, stats=stats)
+
+    assert response.status_code == 200, "Failed to perform transaction"
+    assert stats["reconciled"] == 1, "The dropped response was not reconciled by lookup"
+    transaction = helpers.wait_for_transaction_succeeded(wallet_id,
+                                                         response.json()["transactionId"],
+                                                         api_client)
+    ledger.settle(wallet_id, payload, transaction["outcome"])
+    ledger.checkpoint(api_client, wallet_id)
+
+@pytest.mark.stand_in(faults=["error", "error"])
+def test_server_errors_are_retried(wallet_id, api_client):
+    """Test that 5xx answers are retried with the same key until the transaction is created."""
+    stats = Counter()
+    response = submission.submit_transaction(api_client, wallet_id, payloads.random_credit(),
+                                             stats=stats)
+
+    assert response.status_code == 200, "Failed to perform transaction"
+    assert stats["retried"] == 2
+    assert stats["reconciled"] == 0, "A transaction that was never stored was found"
+
+def test_reused_key_returns_the_same_transaction(wallet_id, api_client):
+    """Test that resubmitting with the same key does not create a second transaction, and a
+    different payload under that key is rejected with 422."""
+    payload = payloads.random_credit()
+    key = submission.new_key()
+    first = submission.submit_transaction(api_client, wallet_id, payload, key=key)
+    second = submission.submit_transaction(api_client, wallet_id, payload, key=key)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["transactionId"] == second.json()["transactionId"]
+
+    conflicting = dict(payload, amount=round(payload["amount"] + 1, 2))
+    response = submission.submit_transaction(api_client, wallet_id, conflicting, key=key)
+    assert response.status_code == 422, (
+        f"Expected 422 for a reused key, but got {response.status_code}"
+    )
+
+@pytest.mark.stand_in(faults=["drop"], idempotency=False)
+def test_dropped_response_reconciled_from_history(wallet_id, api_client):
+    """Test that without key lookups (as on the live API) a lost response is found in the
+    wallet's transaction history instead of being sent again."""
+    ledger = Ledger()
+    payload = payloads.random_credit()
+    stats = Counter()
+    # a client of its own, so the key support probe runs against this wallet
+    with WalletApiClient(headers=auth.service_headers(), auth=api_client.auth) as client:
+        assert not submission.key_lookup_supported(client, wallet_id)
+        ledger.submit(wallet_id, payload)
+        response = submission.submit_transaction(client, wallet_id, payload, stats=stats)
+
+    assert response.status_code == 200, "Failed to perform transaction"
+    assert stats["reconciled"] == 1, "The dropped response was not found in the history"
+    transaction = helpers.wait_for_transaction_succeeded(wallet_id,
+                                                         response.json()["transactionId"],
+                                                         api_client)
+    ledger.settle(wallet_id, payload, transaction["outcome"])
+    ledger.checkpoint(api_client, wallet_id)
+
+@pytest.mark.stand_in(faults=[None, "drop"], idempotency=False)
+def test_inconclusive_history_is_not_resubmitted(wallet_id, api_client):
+    """Test that a lost response is reported as ambiguous, not resent, when the history holds
+    more than one transaction it could be."""
+    payload = payloads.random_credit()
+    first = api_client.post_transaction(wallet_id, payload)
+    assert first.status_code == 200, "Failed to perform transaction"
+
+    with WalletApiClient(headers=auth.service_headers(), auth=api_client.auth) as client:
+        submission.key_lookup_supported(client, wallet_id)
+        with pytest.raises(submission.AmbiguousSubmissionError):
+            submission.submit_transaction(client, wallet_id, payload)
+
+    history = api_client.get(f"/wallet/{wallet_id}/transactions").json()
+    assert history["totalCount"] == 2, "The ambiguous transaction was sent again"
+
+@pytest.mark.stand_in(faults=[None, "error"], idempotency=False)
+def test_history_match_skips_claimed_transactions(wallet_id, api_client):
+    """Test that a failed submission is not matched to an identical transaction another
+    submission already resolved to, it is sent again instead."""
+    payload = payloads.random_credit()
+    with WalletApiClient(headers=auth.service_headers(), auth=api_client.auth) as client:
+        first = submission.submit_transaction(client, wallet_id, payload)
+        stats = Counter()
+        second = submission.submit_transaction(client, wallet_id, payload, stats=stats)
+
+    assert first.status_code == second.status_code == 200, "Failed to perform transaction"
+    assert first.json()["transactionId"] != second.json()["transactionId"], (
+        "The retried submission was matched to its sibling's transaction"
+    )
+    assert stats["reconciled"] == 0
+
+def test_history_honours_date_limits(wallet_id, api_client):
+    """Test that the transaction history carries ISO-8601 times and applies startDate and
+    endDate, which history reconciliation relies on."""
+    response = api_client.post_transaction(wallet_id, payloads.random_credit())
+    assert response.status_code == 200, "Failed to perform transaction"
+    created = datetime.fromisoformat(response.json()["createdAt"].replace("Z", "+00:00"))
+
+    def history(**dates):
+        params = {name: value.strftime("%Y-%m-%dT%H:%M:%S.%fZ") for name, value in dates.items()}
+        return api_client.get(f"/wallet/{wallet_id}/transactions", params=params).json()
+
+    assert history(startDate=created - timedelta(seconds=1))["totalCount"] == 1
+    assert history(startDate=created + timedelta(seconds=1))["totalCount"] == 0
+    assert history(endDate=created - timedelta(seconds=1))["totalCount"] == 0
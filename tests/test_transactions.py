@@ -1,17 +1,15 @@
 """This module provides tests for wallet transactions."""
 
 import random
-import requests
-import config
-from common import helpers
+import pytest
+from common import helpers, load, payload_matrix, polling
+from common.ledger import Ledger
 
-def test_wallet_initialization_and_initial_transactions(wallet_id, auth_headers):
+def test_wallet_initialization_and_initial_transactions(wallet_id, api_client):
     """Test wallet initialization and multiple currency transactions."""
     # Generate a wallet ID and verify it is initially empty
-    wallet_url = f"{config.BASE_URL}/wallet/{wallet_id}"
-    response = requests.get(wallet_url, 
-                            headers=auth_headers, 
-                            timeout=config.DEFAULT_API_TIMEOUT)
+    wallet_url = f"/wallet/{wallet_id}"
+    response = api_client.get(wallet_url)
     
     assert response.status_code == 200, (
         f"Wallet initialization failed, expected 200 but got {response.status_code}"
@@ -20,7 +18,7 @@ def test_wallet_initialization_and_initial_transactions(wallet_id, auth_headers)
     data = response.json()
     assert data["currencyClips"] == []
     
-    transaction_url = f"{config.BASE_URL}/wallet/{wallet_id}/transaction"
+    transaction_url = f"/wallet/{wallet_id}/transaction"
     currencies = ["USD", "EUR", "GBP"]
     transaction_ids = []
     transaction_data = []
@@ -31,10 +29,7 @@ def test_wallet_initialization_and_initial_transactions(wallet_id, auth_headers)
                    "amount": round(random.uniform(1, 500), 2), 
                    "type": "credit"}        
         
-        response = requests.post(transaction_url, 
-                                 json=payload, 
-                                 headers=auth_headers, 
-                                 timeout=config.DEFAULT_API_TIMEOUT)
+        response = api_client.post(transaction_url, json=payload)
         
         assert response.status_code == 200, (
             f"Failed to perform transaction for {currency} expected 200 but "
@@ -57,11 +52,9 @@ def test_wallet_initialization_and_initial_transactions(wallet_id, auth_headers)
     for transaction_id in transaction_ids:
         helpers.wait_for_transaction_status_update(wallet_id, 
                                                    transaction_id, 
-                                                   auth_headers)
+                                                   api_client)
         
-        response = requests.get(f"{transaction_url}/{transaction_id}", 
-                                headers=auth_headers, 
-                                timeout=config.DEFAULT_API_TIMEOUT)
+        response = api_client.get(f"{transaction_url}/{transaction_id}")
         
         assert response.status_code == 200, (
             f"Failed to fetch transaction {transaction_id}, expected 200 but "
@@ -73,9 +66,7 @@ def test_wallet_initialization_and_initial_transactions(wallet_id, auth_headers)
         assert data["outcome"] == "approved", f"Transaction {transaction_id} was not approved"
     
     # Fetch wallet data and verify that the transactions were successfully reflected there
-    response = requests.get(wallet_url, 
-                            headers=auth_headers, 
-                            timeout=config.DEFAULT_API_TIMEOUT)
+    response = api_client.get(wallet_url)
     
     assert response.status_code == 200, (
         f"Failed to fetch wallet data, expected 200 but got {response.status_code}"
@@ -98,30 +89,25 @@ def test_wallet_initialization_and_initial_transactions(wallet_id, auth_headers)
                     "transaction amount"
                 )
     
-def test_credit_transaction_exceeding_bank_balance(wallet_id, auth_headers):
+@pytest.mark.stand_in(bank_balance={"USD": 100})
+def test_credit_transaction_exceeding_bank_balance(wallet_id, api_client):
     """Test that exceeding the balance of the bank/3rd party service making 
     the payment causes the transaction to be denied"""
     # Test assumes that the bank/3rd party service account starts with a balance 
     # of 100 USD, should be configured in that way
     bank_available_amount = 100
-    transaction_url = f"{config.BASE_URL}/wallet/{wallet_id}/transaction"
+    transaction_url = f"/wallet/{wallet_id}/transaction"
 
     # Perform the first transaction within the balance
     first_transaction_payload = {"currency": "USD", 
                                  "amount": bank_available_amount, 
                                  "type": "credit"}
     
-    first_transaction_response = requests.post(transaction_url, 
-                                               json=first_transaction_payload, 
-                                               headers=auth_headers, 
-                                               timeout=config.DEFAULT_API_TIMEOUT)
+    first_transaction_response = api_client.post(transaction_url, json=first_transaction_payload)
 
     # Perform the second transaction exceeding the balance immediately
     second_transaction_payload = {"currency": "USD", "amount": 1, "type": "credit"}
-    second_transaction_response = requests.post(transaction_url, 
-                                                json=second_transaction_payload, 
-                                                headers=auth_headers, 
-                                                timeout=config.DEFAULT_API_TIMEOUT)
+    second_transaction_response = api_client.post(transaction_url, json=second_transaction_payload)
 
     first_transaction_id = first_transaction_response.json()["transactionId"]
     second_transaction_id = second_transaction_response.json()["transactionId"]
@@ -129,10 +115,10 @@ def test_credit_transaction_exceeding_bank_balance(wallet_id, auth_headers):
     # Wait for both transactions to complete
     first_transaction_data = helpers.wait_for_transaction_status_update(wallet_id, 
                                                                         first_transaction_id, 
-                                                                        auth_headers)
+                                                                        api_client)
     second_transaction_data = helpers.wait_for_transaction_status_update(wallet_id, 
                                                                          second_transaction_id, 
-                                                                         auth_headers)
+                                                                         api_client)
 
     # Assert the first transaction was performed successfuly and the second was denied
     
@@ -150,27 +136,21 @@ def test_credit_transaction_exceeding_bank_balance(wallet_id, auth_headers):
         "Second transaction was not denied as expected"
     )
 
-def test_debit_transaction_exceeding_wallet_balance(funded_wallet, auth_headers):
+def test_debit_transaction_exceeding_wallet_balance(funded_wallet, api_client):
     """Test that exceeding the balance of the wallet causes the debit transaction 
     to be denied"""
     # Add some initial funds to the wallet and wait for the transaction to finish
-    transaction_url = f"{config.BASE_URL}/wallet/{funded_wallet['wallet_id']}/transaction"
+    transaction_url = f"/wallet/{funded_wallet['wallet_id']}/transaction"
 
     # Perform the first transaction within the balance
     first_transaction_payload = {"currency": funded_wallet["currency"], 
                                  "amount": funded_wallet["amount"], "type": "debit"}
-    first_transaction_response = requests.post(transaction_url, 
-                                               json=first_transaction_payload, 
-                                               headers=auth_headers, 
-                                               timeout=config.DEFAULT_API_TIMEOUT)
+    first_transaction_response = api_client.post(transaction_url, json=first_transaction_payload)
 
     # Immediately Perform the second transaction which is exceeding the balance
     second_transaction_payload = {"currency": funded_wallet["currency"], 
                                   "amount": 1, "type": "debit"}
-    second_transaction_response = requests.post(transaction_url, 
-                                                json=second_transaction_payload, 
-                                                headers=auth_headers, 
-                                                timeout=config.DEFAULT_API_TIMEOUT)
+    second_transaction_response = api_client.post(transaction_url, json=second_transaction_payload)
 
     first_transaction_id = first_transaction_response.json()["transactionId"]
     second_transaction_id = second_transaction_response.json()["transactionId"]
@@ -178,10 +158,10 @@ def test_debit_transaction_exceeding_wallet_balance(funded_wallet, auth_headers)
     # Wait for both transactions to complete
     first_transaction_data = helpers.wait_for_transaction_status_update(
         funded_wallet["wallet_id"],
-        first_transaction_id, auth_headers)
+        first_transaction_id, api_client)
     second_transaction_data = helpers.wait_for_transaction_status_update(
         funded_wallet["wallet_id"], 
-        second_transaction_id, auth_headers)
+        second_transaction_id, api_client)
 
     # Assert the first transaction was performed successfuly and the second was denied
     assert first_transaction_data["status"] == "finished", (
@@ -198,14 +178,14 @@ def test_debit_transaction_exceeding_wallet_balance(funded_wallet, auth_headers)
         "Second transaction was not denied as expected"
     )
 
-def test_concurrent_transactions(wallet_id, auth_headers):
+@pytest.mark.parametrize("backend", load.BACKENDS)
+def test_concurrent_transactions(wallet_id, api_client, settlement_listener, backend):
     """
-    Test performing multiple transactions sequentially and verify that they are
-      processed correctly.
+    Test performing multiple transactions concurrently and verify that the wallet balance
+      is consistent with the outcome of each transaction.
     """
     transaction_amount = round(random.uniform(1, 500), 2)
 
-    transaction_url = f"{config.BASE_URL}/wallet/{wallet_id}/transaction"
     payloads = [
         {"currency": "USD", "amount": transaction_amount, "type": "credit"},
         {"currency": "USD", "amount": transaction_amount, "type": "credit"},
@@ -214,136 +194,127 @@ def test_concurrent_transactions(wallet_id, auth_headers):
         {"currency": "USD", "amount": transaction_amount, "type": "debit"}
     ]
 
-    responses = [requests.post(transaction_url, 
-                               json=payload, headers=auth_headers, 
-                               timeout=config.DEFAULT_API_TIMEOUT) 
-                               for payload in payloads]
-    
-    transaction_ids = [response.json()["transactionId"] for response in responses]
+    ledger = Ledger()
+    for payload in payloads:
+        ledger.submit(wallet_id, payload)
 
-    for transaction_id in transaction_ids:
-        transaction_data = helpers.wait_for_transaction_succeeded(wallet_id, 
-                                                                  transaction_id, 
-                                                                  auth_headers)
+    # Fire all payloads at once, debits may race ahead of the credits funding them
+    submission = load.submit_transactions(api_client, wallet_id, payloads, backend=backend)
+    for result in submission["results"]:
+        assert result["status_code"] == 200, (
+            f"Failed to perform transaction, expected 200 but got {result['status_code']}"
+        )
+    transaction_ids = [result["body"]["transactionId"] for result in submission["results"]]
+
+    results = helpers.wait_for_transactions(wallet_id, 
+                                            transaction_ids, 
+                                            helpers.transaction_settled, 
+                                            api_client, 
+                                            listener=settlement_listener)
+    for payload, transaction_id in zip(payloads, transaction_ids):
+        transaction_data = results[transaction_id]["data"]
         assert transaction_data["status"] == "finished", (
             f"Transaction {transaction_id} did not finish"
         )
+        if payload["type"] == "credit":
+            assert transaction_data["outcome"] == "approved", (
+                f"Credit transaction {transaction_id} was not approved"
+            )
+        ledger.settle(wallet_id, payload, transaction_data["outcome"])
 
     # Fetch wallet data and verify that the transactions were successfully reflected there
-    response = requests.get(f"{config.BASE_URL}/wallet/{wallet_id}", 
-                            headers=auth_headers, 
-                            timeout=config.DEFAULT_API_TIMEOUT)
-    
-    assert response.status_code == 200, (
-        f"Failed to fetch wallet data, expected 200 but got {response.status_code}"
-    )
-    data = response.json()
+    data = ledger.checkpoint(api_client, wallet_id)
     assert len(data["currencyClips"]) == 1, (
         "Available wallet currencies does not match the amount of transactions made"
     )
-    assert data["currencyClips"][0]["amount"] == transaction_amount, (
-        "Amount of currency in wallet does not match transaction amount"
-    )
 
-def test_large_volume_of_transactions(wallet_id, auth_headers):
+def test_large_volume_of_transactions(wallet_id, api_client, settlement_listener):
     """
     Test the system's ability to handle a large number of transactions in a short period.
     """
     # Test assumes there are sufficient funds in the bank/3rd party service account 
     # to perform the transactions
-    transaction_url = f"{config.BASE_URL}/wallet/{wallet_id}/transaction"
     num_transactions = 100
-    transaction_ids = []
+    payloads = [{"currency": "USD", 
+                 "amount": round(random.uniform(1, 10), 2), 
+                 "type": "credit"} for _ in range(num_transactions)]
 
-    # Perform 100 credit transactions
-    for _ in range(num_transactions):
-        payload = {"currency": "USD", 
-                   "amount": round(random.uniform(1, 10), 2), 
-                   "type": "credit"}
-        
-        response = requests.post(transaction_url, 
-                                 json=payload, 
-                                 headers=auth_headers, 
-                                 timeout=config.DEFAULT_API_TIMEOUT)
-        
-        assert response.status_code == 200, "Failed to perform transaction"
-        transaction_ids.append(response.json()["transactionId"])
+    ledger = Ledger()
+    for payload in payloads:
+        ledger.submit(wallet_id, payload)
+
+    # Perform 100 credit transactions in parallel
+    submission = load.submit_transactions(api_client, wallet_id, payloads)
+    for result in submission["results"]:
+        assert result["status_code"] == 200, "Failed to perform transaction"
+    transaction_ids = [result["body"]["transactionId"] for result in submission["results"]]
 
     # Verify all transactions are processed
-    for transaction_id in transaction_ids:
-        transaction_data = helpers.wait_for_transaction_status_update(wallet_id, 
-                                                                      transaction_id, 
-                                                                      auth_headers)
+    results = helpers.wait_for_transactions(wallet_id, 
+                                            transaction_ids, 
+                                            helpers.transaction_settled, 
+                                            api_client, 
+                                            listener=settlement_listener)
+    for payload, transaction_id in zip(payloads, transaction_ids):
+        transaction_data = results[transaction_id]["data"]
         assert transaction_data["status"] == "finished", (
             f"Transaction {transaction_id} did not finish"
         )
         assert transaction_data["outcome"] == "approved", (
             f"Transaction {transaction_id} was not approved"
         )
+        ledger.settle(wallet_id, payload, transaction_data["outcome"])
 
-def test_transaction_invalid_payload(wallet_id, auth_headers):
+    # Verify the wallet holds exactly the sum of the credits
+    ledger.checkpoint(api_client, wallet_id)
+
+def test_transaction_invalid_payload(funded_wallet, api_client):
     """
-    Test that invalid payloads are rejected by the API. (ideally separate tests for 
-    each case for more fine-tuned assertions)
+    Test that invalid payloads are rejected by the API. Every combination of the payload
+    matrix (missing fields, wrong types, boundary amounts, unknown currencies, extra keys and
+    precision edge cases) is submitted concurrently and all unexpected answers are reported.
+    Precision cases the spec leaves open may be accepted, their outcomes go into the ledger.
     """
-    transaction_url = f"{config.BASE_URL}/wallet/{wallet_id}/transaction"
-
-    # Add initial funds to the wallet
-    transaction_amount = round(random.uniform(100, 500), 2)
-    credit_payload = {"currency": "USD", "amount": transaction_amount, "type": "credit"}
-    credit_response = requests.post(transaction_url, 
-                                    json=credit_payload, 
-                                    headers=auth_headers, 
-                                    timeout=config.DEFAULT_API_TIMEOUT)
-    
-    helpers.wait_for_transaction_succeeded(wallet_id, 
-                                           credit_response.json()["transactionId"], 
-                                           auth_headers)
+    wallet_id = funded_wallet["wallet_id"]
+    ledger = Ledger()
+    funding = {"currency": funded_wallet["currency"], "amount": funded_wallet["amount"],
+               "type": "credit"}
+    ledger.submit(wallet_id, funding)
+    ledger.settle(wallet_id, funding, "approved")
 
     # Test assumes a 400 response is returned when an invalid parameter is used
-    payloads = [
-        {"currency": "USD", "amount": -1, "type": "credit"},  # Negative amount
-        {"currency": "USD", "amount": 1, "type": "invalid"},  # Invalid transaction type
-        {"currency": "invalid", "amount": 1, "type": "credit"},  # Invalid currency
-        {"currency": "USD", "amount": 1, "type": "credit", 
-         "invalid_key": "invalid_value"},  # Extra key in payload
-        {"amount": 1, "type": "credit"},  # Missing currency
-        {"currency": "USD", "type": "credit"},  # Missing amount
-        {"currency": "USD", "amount": 1},  # Missing type
-        {"currency": "USD", "amount": 0, "type": "credit"}, # Zero amount
-    ]
-    for payload in payloads:
-        response = requests.post(transaction_url, 
-                                 json=payload, 
-                                 headers=auth_headers, 
-                                 timeout=config.DEFAULT_API_TIMEOUT)
-        
-        assert response.status_code == 400, f"Expected 400 but got {response.status_code}"
+    cases = payload_matrix.build_cases(currency=funded_wallet["currency"])
+    table = payload_matrix.run_cases(api_client, wallet_id, cases)
 
-    # Verify wallet balance remains unchanged
-    wallet_url = f"{config.BASE_URL}/wallet/{wallet_id}"
-    wallet_response = requests.get(wallet_url, 
-                                   headers=auth_headers, 
-                                   timeout=config.DEFAULT_API_TIMEOUT)
-    
-    assert wallet_response.status_code == 200, "Failed to fetch wallet data"
-    wallet_data = wallet_response.json()
-    assert wallet_data["currencyClips"][0]["amount"] == transaction_amount, (
-        "Wallet balance changed after failed transaction"
+    failed = payload_matrix.unexpected(table)
+    assert not failed, (
+        f"{len(failed)} of {len(table)} invalid payloads were not rejected with 400:\n"
+        f"{payload_matrix.format_table(failed)}"
     )
 
-def test_transaction_timeout(wallet_id, auth_headers):
+    # Verify the wallet balance only changed by the accepted precision cases
+    accepted = {row["transactionId"]: row["payload"] for row in table if "transactionId" in row}
+    for payload in accepted.values():
+        ledger.submit(wallet_id, payload)
+    settled = helpers.wait_for_transactions(wallet_id, list(accepted), helpers.transaction_settled,
+                                            api_client)
+    for transaction_id, payload in accepted.items():
+        ledger.settle(wallet_id, payload, settled[transaction_id]["data"]["outcome"])
+    ledger.checkpoint(api_client, wallet_id)
+
+@pytest.mark.long_polling
+@pytest.mark.stand_in(hold_pending=True)
+def test_transaction_timeout(wallet_id, api_client, server_clock):
     """
     Test that a transaction in the 'pending' state is automatically denied after 30 minutes.
+    Against the stand-in the server clock is jumped past the timeout, against the live API the
+    test waits for it in real time.
     """
-    transaction_url = f"{config.BASE_URL}/wallet/{wallet_id}/transaction"
+    transaction_url = f"/wallet/{wallet_id}/transaction"
 
     # Initiate a transaction that will remain in the 'pending' state
     payload = {"currency": "USD", "amount": 100, "type": "credit"}
-    response = requests.post(transaction_url, 
-                             json=payload, 
-                             headers=auth_headers, 
-                             timeout=config.DEFAULT_API_TIMEOUT)
+    response = api_client.post(transaction_url, json=payload)
     
     assert response.status_code == 200, "Failed to initiate transaction"
     transaction_data = response.json()
@@ -353,25 +324,36 @@ def test_transaction_timeout(wallet_id, auth_headers):
 
     # Simulate a transaction timeout on the remote server end and query in some interval till 
     # 30 minutes have passed
-
-    # Fetch the transaction status after the timeout
-    timeout_response = helpers.wait_for_transaction_status_update(wallet_id, 
-                                                                  transaction_data["transactionId"], 
-                                                                  auth_headers, 
-                                                                  timeout=1800)
+    server_clock.advance(30 * 60)
+
+    # Fetch the transaction status after the timeout, backing off up to 30 seconds between polls
+    timeout_response = helpers.wait_for_transaction_status_update(
+        wallet_id, 
+        transaction_data["transactionId"], 
+        api_client, 
+        strategy=polling.ExponentialBackoff(cap=30),
+        timeout=1800)
     assert timeout_response["status"] == "finished", (
         "Transaction did not move to 'finished' state after timeout"
     )
     assert timeout_response["outcome"] == "denied", "Transaction was not denied after timeout"
 
     # Verify the wallet balance remains unchanged
-    wallet_url = f"{config.BASE_URL}/wallet/{wallet_id}"
-    wallet_response = requests.get(wallet_url, 
-                                   headers=auth_headers, 
-                                   timeout=config.DEFAULT_API_TIMEOUT)
+    wallet_url = f"/wallet/{wallet_id}"
+    wallet_response = api_client.get(wallet_url)
     
     assert wallet_response.status_code == 200, "Failed to fetch wallet data"
     wallet_data = wallet_response.json()
     assert len(wallet_data["currencyClips"]) == 0, (
         "Wallet balance should remain unchanged after denied transaction")
-    
\ No newline at end of file
+    
+def test_batch_wait_fails_fast_on_denied_transaction(wallet_id, api_client):
+    """Test that polling a batch for approval fails as soon as a transaction is denied
+    instead of waiting for the deadline."""
+    response = api_client.post_transaction(wallet_id, {"currency": "USD", "amount": 1,
+                                                       "type": "debit"})
+    assert response.status_code == 200, "Failed to perform transaction"
+
+    with pytest.raises(AssertionError, match="does not satisfy the predicate"):
+        helpers.wait_for_transactions(wallet_id, [response.json()["transactionId"]],
+                                      helpers.transaction_approved, api_client, timeout=60)
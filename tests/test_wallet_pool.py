@@ -0,0 +1,24 @@
+"""This module provides tests for the pre-funded wallet pool."""
+
+import pytest
+import config
+from common import payloads
+from common.wallet_pool import FundedWalletPool
+
+def test_pool_survives_unexpected_funding_errors():
+    """Test that any funding error reaches acquire() and the pool keeps refilling."""
+    pool = FundedWalletPool(api_client=None, size=2, low_watermark=1).start()
+    try:
+        for _ in range(3):
+            with pytest.raises(AttributeError):
+                pool.acquire(timeout=5)
+    finally:
+        pool.close()
+
+@pytest.mark.skipif(config.API_TARGET != "local",
+                    reason="requires the local stand-in (WALLET_API_TARGET=local)")
+@pytest.mark.stand_in(faults=["error"])
+def test_stand_in_marker_applies_to_funded_wallet(funded_wallet, api_client):
+    """Test that a stand_in marker configures the wallet taken from the pool."""
+    response = api_client.post_transaction(funded_wallet["wallet_id"], payloads.random_credit())
+    assert response.status_code == 503, "The marker's fault was not applied to the wallet"